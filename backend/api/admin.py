@@ -1,6 +1,7 @@
 from django.contrib import admin
 from .models import (
     AutoPart,
+    Category,
     Customer,
     Store,
     Employee,
@@ -16,6 +17,7 @@ from .models import (
 )
 
 admin.site.register(AutoPart)
+admin.site.register(Category)
 admin.site.register(Customer)
 admin.site.register(Store)
 admin.site.register(Employee)
@@ -0,0 +1,68 @@
+"""
+Session-backed shopping cart.
+
+The cart is stored compactly as {part_id: quantity}; names and prices are
+resolved server-side when the cart is shown or checked out. Reading the
+cart never marks the session modified, so read-only requests do not cause
+a session write. Only a real change to the contents does.
+"""
+
+SESSION_KEY = 'cart'
+
+
+def _quantity(value):
+    # Older carts stored {"name": ..., "unit_price": ..., "quantity": n} per line
+    if isinstance(value, dict):
+        value = value.get('quantity', 1)
+    try:
+        return max(1, int(value))
+    except (TypeError, ValueError):
+        return 1
+
+
+class CartStore:
+    def __init__(self, session):
+        self.session = session
+        raw = session.get(SESSION_KEY)
+        if not isinstance(raw, dict):
+            raw = {}
+        self._items = {str(key): _quantity(value) for key, value in raw.items()}
+        self._dirty = False
+
+    def items(self):
+        """{part_key: quantity}"""
+        return dict(self._items)
+
+    def count(self):
+        return sum(self._items.values())
+
+    def __bool__(self):
+        return bool(self._items)
+
+    def add(self, key, quantity=1):
+        key = str(key)
+        self.set(key, self._items.get(key, 0) + quantity)
+
+    def set(self, key, quantity):
+        """Set a line's quantity; zero or less removes it"""
+        key = str(key)
+        if quantity <= 0:
+            self.remove(key)
+        elif self._items.get(key) != quantity:
+            self._items[key] = quantity
+            self._dirty = True
+
+    def remove(self, key):
+        if self._items.pop(str(key), None) is not None:
+            self._dirty = True
+
+    def clear(self):
+        if self._items:
+            self._items = {}
+            self._dirty = True
+
+    def save(self):
+        """Write to the session only if the contents changed"""
+        if self._dirty:
+            self.session[SESSION_KEY] = self._items
+            self._dirty = False
@@ -0,0 +1,71 @@
+"""
+Cached view of the category table.
+
+The table is tiny and rarely changes, so the whole tree is cached and
+catalog/search filters turn a slug into an exact `category_ref IN (...)`
+lookup without touching the category table.
+"""
+from django.core.cache import cache
+
+from .models import Category, category_slug
+
+TREE_CACHE_KEY = 'categories:tree'
+
+
+def _tree():
+    tree = cache.get(TREE_CACHE_KEY)
+    if tree is None:
+        rows = list(Category.objects.values_list('slug', 'name', 'parent__slug').order_by('name'))
+        tree = {
+            'labels': {slug: name for slug, name, _ in rows},
+            'parents': {slug: parent for slug, _, parent in rows if parent},
+            'children': {},
+            'top_level': [(slug, name) for slug, name, parent in rows if parent is None],
+        }
+        for slug, _, parent in rows:
+            if parent:
+                tree['children'].setdefault(parent, []).append(slug)
+        cache.set(TREE_CACHE_KEY, tree, None)
+    return tree
+
+
+def invalidate():
+    cache.delete(TREE_CACHE_KEY)
+
+
+def label(slug):
+    return _tree()['labels'].get(slug)
+
+
+def top_level():
+    """[(slug, name), ...] of categories without a parent"""
+    return _tree()['top_level']
+
+
+def all_categories():
+    """[(slug, name), ...] of every category"""
+    return sorted(_tree()['labels'].items(), key=lambda item: item[1])
+
+
+def descendant_slugs(slug):
+    """`slug` plus the slugs of all categories below it"""
+    children = _tree()['children']
+    slugs = [slug]
+    for current in slugs:
+        slugs.extend(children.get(current, []))
+    return slugs
+
+
+def ancestor_slugs(slug):
+    """Parents of `slug`, nearest first"""
+    parents = _tree()['parents']
+    slugs = []
+    while slug in parents and parents[slug] not in slugs:
+        slug = parents[slug]
+        slugs.append(slug)
+    return slugs
+
+
+def filter_by_category(parts, value):
+    """Restrict `parts` to a category given by slug or free-text name (children included)"""
+    return parts.filter(category_ref__in=descendant_slugs(category_slug(value)))
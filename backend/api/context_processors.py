@@ -0,0 +1,11 @@
+from django.conf import settings
+
+from .cart import CartStore
+
+
+def cart(request):
+    """Cart count for the nav badge in base.html, rendered with the page"""
+    # No session cookie means no cart; don't load or create a session for it
+    if settings.SESSION_COOKIE_NAME not in request.COOKIES:
+        return {'cart_count': 0}
+    return {'cart_count': CartStore(request.session).count()}
@@ -0,0 +1,106 @@
+"""
+In-process fan-out of order events to Server-Sent Events clients.
+
+Each connected employee terminal is an asyncio task waiting on its own
+queue, so idle connections cost a queue and a coroutine rather than a
+thread. Publishers run in ordinary sync request threads and hand events to
+each subscriber's event loop with call_soon_threadsafe.
+
+The hub only reaches clients connected to the same process. With several
+worker processes, clients still pick up changes from the by_store change
+feed, which they fall back to polling at a slower rate.
+"""
+import asyncio
+import json
+import threading
+from collections import defaultdict
+
+from django.db import transaction
+
+# Events a slow client may fall behind by before it is told to resync
+QUEUE_SIZE = 100
+
+ORDER_CREATED = 'order.created'
+ORDER_UPDATED = 'order.updated'
+RESYNC = 'resync'
+
+
+class Subscription:
+    def __init__(self, store_id, loop):
+        self.store_id = store_id
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+    def offer(self, event):
+        """Runs on the subscriber's loop"""
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Drop the backlog; the client reloads from the change feed
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({'type': RESYNC})
+
+
+class OrderEventHub:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)  # store_id -> {Subscription}
+
+    def subscribe(self, store_id):
+        """Call from the subscriber's event loop"""
+        subscription = Subscription(store_id, asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers[store_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.store_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.store_id]
+
+    def publish(self, store_id, event):
+        """Safe to call from any thread"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(store_id, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, event)
+            except RuntimeError:
+                # Loop already closed; the stream is gone
+                self.unsubscribe(subscription)
+
+    def subscriber_count(self, store_id=None):
+        with self._lock:
+            if store_id is not None:
+                return len(self._subscribers.get(store_id, ()))
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+
+hub = OrderEventHub()
+
+
+def publish_order_event(order, event_type):
+    """Publish an event for `order` once the current transaction commits"""
+    publish_order_events([(order.store_id, order.order_id, order.status)], event_type)
+
+
+def publish_order_events(changes, event_type):
+    """Publish one event per (store_id, order_id, status) once the current transaction commits"""
+    events = [
+        (store_id, {'type': event_type, 'order_id': order_id, 'status': status})
+        for store_id, order_id, status in changes
+    ]
+
+    def publish():
+        for store_id, event in events:
+            hub.publish(store_id, event)
+
+    transaction.on_commit(publish)
+
+
+def format_event(event):
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
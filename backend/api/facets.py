@@ -0,0 +1,94 @@
+"""
+Facet counts (category, condition, price band) for a filtered set of parts.
+
+All three facets come from a single GROUP BY over the filtered parts, and
+the result is cached per filter combination. Cache keys include the
+catalog version, which the AutoPart signals bump, so edits show up at once.
+"""
+import hashlib
+import json
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, CharField, Count, Value, When
+
+from . import categories
+from .models import AutoPart
+
+# (key, label, lower bound inclusive, upper bound exclusive)
+PRICE_BANDS = [
+    ('under-25', 'Under $25', None, Decimal('25')),
+    ('25-100', '$25 - $100', Decimal('25'), Decimal('100')),
+    ('100-250', '$100 - $250', Decimal('100'), Decimal('250')),
+    ('250-plus', '$250 and up', Decimal('250'), None),
+]
+
+VERSION_CACHE_KEY = 'catalog:version'
+
+
+def catalog_version():
+    return cache.get_or_set(VERSION_CACHE_KEY, 1, None)
+
+
+def bump_catalog_version():
+    try:
+        cache.incr(VERSION_CACHE_KEY)
+    except ValueError:
+        cache.set(VERSION_CACHE_KEY, 1, None)
+
+
+def _price_band():
+    whens = [When(unit_price__lt=upper, then=Value(key)) for key, _, _, upper in PRICE_BANDS if upper is not None]
+    return Case(*whens, default=Value(PRICE_BANDS[-1][0]), output_field=CharField())
+
+
+def compute_facets(parts):
+    """Facet counts for the `parts` queryset in one grouped query"""
+    rows = (
+        parts.order_by()
+        .values('category_ref', 'condition', band=_price_band())
+        .annotate(count=Count('pk'))
+    )
+
+    total = 0
+    by_category = {}
+    by_condition = {}
+    by_band = {}
+    for row in rows:
+        count = row['count']
+        total += count
+        # Parent categories count their subcategories' parts too
+        slug = row['category_ref']
+        if slug:
+            for key in [slug, *categories.ancestor_slugs(slug)]:
+                by_category[key] = by_category.get(key, 0) + count
+        by_condition[row['condition']] = by_condition.get(row['condition'], 0) + count
+        by_band[row['band']] = by_band.get(row['band'], 0) + count
+
+    return {
+        'total': total,
+        'category': [
+            {'slug': slug, 'name': categories.label(slug) or slug, 'count': count}
+            for slug, count in sorted(by_category.items())
+        ],
+        'condition': [
+            {'value': code, 'label': label, 'count': by_condition.get(code, 0)}
+            for code, label in AutoPart.CONDITION_CHOICES
+        ],
+        'price': [
+            {'band': key, 'label': label, 'count': by_band.get(key, 0)}
+            for key, label, _, _ in PRICE_BANDS
+        ],
+    }
+
+
+def cached_facets(parts, **filters):
+    """compute_facets() cached under the filters that produced `parts`"""
+    raw = json.dumps(filters, sort_keys=True)
+    key = f'facets:{catalog_version()}:{hashlib.md5(raw.encode()).hexdigest()}'
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_facets(parts)
+        cache.set(key, facets, settings.FACET_CACHE_TTL)
+    return facets
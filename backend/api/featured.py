@@ -0,0 +1,78 @@
+"""
+Featured products for the home page.
+
+Rather than ORDER BY RANDOM() over the whole part table on every hit, a
+pool of candidate part ids is built every FEATURED_POOL_TTL seconds and
+kept in the cache. Each request draws from the pool in O(1) per pick and
+fetches only the chosen parts by primary key.
+"""
+import math
+import random
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Sum
+
+from .models import AutoPart, Inventory, OrderItem
+
+POOL_CACHE_KEY = 'featured_parts:pool'
+MAX_WEIGHT = 4
+
+
+def _weight(sales):
+    # Best sellers show up more often, but no part more than MAX_WEIGHT times
+    return min(MAX_WEIGHT, 1 + int(math.log2(1 + sales)))
+
+
+def build_pool():
+    """
+    List of candidate part ids, each repeated by its weight so a uniform
+    pick from the list is a weighted pick. Out-of-stock parts are left
+    out once any inventory is being tracked.
+    """
+    stock = dict(
+        Inventory.objects.values('part_id').annotate(total=Sum('quantity_on_hand')).values_list('part_id', 'total')
+    )
+    sales = dict(
+        OrderItem.objects.values('part_id').annotate(total=Sum('quantity')).values_list('part_id', 'total')
+    )
+
+    candidates = []
+    for part_id in AutoPart.objects.values_list('part_id', flat=True).iterator():
+        if stock and not stock.get(part_id):
+            continue
+        weight = _weight(sales.get(part_id, 0)) if settings.FEATURED_WEIGHTED else 1
+        candidates.append((weight, random.random(), part_id))
+
+    # Keep the pool bounded; random tiebreak so the cut is fair among equals
+    candidates.sort(reverse=True)
+    candidates = candidates[:settings.FEATURED_POOL_SIZE]
+
+    return [part_id for weight, _, part_id in candidates for _ in range(weight)]
+
+
+def get_pool():
+    pool = cache.get(POOL_CACHE_KEY)
+    if pool is None:
+        pool = build_pool()
+        cache.set(POOL_CACHE_KEY, pool, settings.FEATURED_POOL_TTL)
+    return pool
+
+
+def featured_parts(count=6):
+    """Sample `count` distinct featured parts"""
+    pool = get_pool()
+    if not pool:
+        return []
+
+    picked = []
+    # Bounded number of draws; duplicates from weighting are simply skipped
+    for _ in range(count * 4):
+        part_id = random.choice(pool)
+        if part_id not in picked:
+            picked.append(part_id)
+            if len(picked) == count:
+                break
+
+    parts = AutoPart.objects.in_bulk(picked)
+    return [parts[part_id] for part_id in picked if part_id in parts]
@@ -0,0 +1,143 @@
+"""
+Idempotency-Key support for endpoints that create orders.
+
+A client sends the same `Idempotency-Key` header on every retry of one
+logical request. The first successful response is stored in the
+IdempotencyKey table for IDEMPOTENCY_KEY_TTL seconds and replayed for later
+retries, so a timed-out checkout that is retried does not create a second
+order. The table is shared by every worker process, and its unique
+(scope, owner, key) constraint lets exactly one request claim a key.
+Expired rows are taken over by the next request with that key and deleted
+by `manage.py purge_idempotency_keys`.
+"""
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+# How long a request may hold its key before another attempt can take over
+IN_FLIGHT_TTL = 60
+
+
+def _fingerprint(request):
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+def _owner(request, owner_field):
+    # Keys are per customer: the logged-in one, or the one named in the body
+    if owner_field:
+        value = request.data.get(owner_field) if hasattr(request.data, 'get') else None
+    else:
+        value = request.session.get('customer_id')
+    return '' if value is None else str(value)[:50]
+
+
+def _claim(scope, owner, key, fingerprint):
+    """
+    Claim the key for this request. Returns None if claimed, otherwise the
+    IdempotencyKey row of the request that holds it.
+    """
+    now = timezone.now()
+    in_flight_until = now + timedelta(seconds=IN_FLIGHT_TTL)
+    try:
+        with transaction.atomic():
+            IdempotencyKey.objects.create(
+                scope=scope, owner=owner, key=key,
+                fingerprint=fingerprint, expires_at=in_flight_until,
+            )
+        return None
+    except IntegrityError:
+        pass
+
+    entry = IdempotencyKey.objects.filter(scope=scope, owner=owner, key=key).first()
+    if entry is None:
+        # Deleted since the insert failed (the other request failed); retry once
+        return _claim(scope, owner, key, fingerprint)
+    if entry.expires_at > now:
+        return entry
+
+    # Expired: take it over, unless another request got there first
+    taken = IdempotencyKey.objects.filter(pk=entry.pk, expires_at=entry.expires_at).update(
+        state='IN_FLIGHT', fingerprint=fingerprint, response_status=None,
+        response_data=None, expires_at=in_flight_until,
+    )
+    if taken:
+        return None
+    return IdempotencyKey.objects.filter(pk=entry.pk).first() or entry
+
+
+def _replay(entry):
+    response = Response(entry.response_data, status=entry.response_status)
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def idempotent(scope, owner_field=None):
+    """
+    Decorator for DRF function views and viewset actions. Requests without
+    the header are passed straight through. Keys belong to the session's
+    customer, or with `owner_field` to the customer named by that field of
+    the request body (for callers without a customer session).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # Function views are called with (request,), actions with (self, request)
+            request = args[-1]
+            key = request.headers.get(HEADER)
+            if not key:
+                return view(*args, **kwargs)
+            if len(key) > MAX_KEY_LENGTH:
+                return Response({'error': f'{HEADER} is too long'},
+                              status=status.HTTP_400_BAD_REQUEST)
+
+            owner = _owner(request, owner_field)
+            fingerprint = _fingerprint(request)
+
+            entry = _claim(scope, owner, key, fingerprint)
+            if entry is not None:
+                if entry.fingerprint != fingerprint:
+                    return Response({'error': f'{HEADER} was already used with a different request'},
+                                  status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+                if entry.state == 'IN_FLIGHT':
+                    return Response({'error': 'A request with this key is still being processed'},
+                                  status=status.HTTP_409_CONFLICT)
+                return _replay(entry)
+
+            claimed = IdempotencyKey.objects.filter(scope=scope, owner=owner, key=key)
+            try:
+                response = view(*args, **kwargs)
+            except Exception:
+                claimed.delete()
+                raise
+
+            # Only successful results are kept; failures may be retried
+            if status.is_success(response.status_code):
+                claimed.update(
+                    state='DONE',
+                    response_status=response.status_code,
+                    response_data=response.data,
+                    expires_at=timezone.now() + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL),
+                )
+            else:
+                claimed.delete()
+            return response
+        return wrapper
+    return decorator
+
+
+def purge_expired():
+    """Delete expired keys; returns how many were removed"""
+    deleted, _ = IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
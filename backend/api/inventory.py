@@ -0,0 +1,130 @@
+"""
+Stock reservation for checkout.
+
+Stock is decremented with one conditional UPDATE per store:
+
+    UPDATE inventory SET quantity_on_hand = quantity_on_hand - <qty for part>
+    WHERE store_id = ? AND part_id IN (...) AND quantity_on_hand >= <qty for part>
+
+The database re-checks the condition on each row under its row lock, so
+concurrent checkouts can never push stock below zero or lose an update,
+and nothing wider than the touched rows is locked. If any line cannot be
+covered the whole reservation is rolled back and the shortfalls reported.
+
+Receiving a purchase order is the reverse and is also set-based: one
+conditional UPDATE claims the PO, then a single INSERT ... ON CONFLICT
+adds every line to the store's stock, creating missing inventory rows.
+
+Every write here also keeps Inventory.needs_reorder in step with the new
+stock level, in the same UPDATE where it can.
+"""
+from django.db import connection, transaction
+from django.db.models import Case, F, IntegerField, OuterRef, Subquery, Value, When
+from django.db.models.lookups import LessThanOrEqual
+
+from .models import AutoPart, Inventory, POLineItem, PurchaseOrder
+
+
+class InsufficientStock(Exception):
+    def __init__(self, shortfalls):
+        super().__init__('Insufficient stock')
+        # [{'part_id': ..., 'requested': ..., 'available': ...}, ...]
+        self.shortfalls = shortfalls
+
+
+class _Rollback(Exception):
+    pass
+
+
+def needs_reorder(quantity):
+    """needs_reorder for an inventory row whose stock becomes `quantity`, for use in update()"""
+    reorder_level = AutoPart.objects.filter(pk=OuterRef('part_id')).values('reorder_level')[:1]
+    return LessThanOrEqual(quantity, Subquery(reorder_level))
+
+
+def refresh_reorder_flags(inventory):
+    """Recompute needs_reorder for an Inventory queryset in one UPDATE"""
+    return inventory.update(needs_reorder=needs_reorder(F('quantity_on_hand')))
+
+
+def _per_part(quantities):
+    return Case(
+        *[When(part_id=part_id, then=Value(qty)) for part_id, qty in quantities.items()],
+        output_field=IntegerField(),
+    )
+
+
+def reserve_stock(store_id, quantities):
+    """
+    Take `quantities` ({part_id: qty}) out of a store's stock, all or nothing.
+    Raises InsufficientStock listing every line that could not be covered.
+    """
+    quantities = {part_id: qty for part_id, qty in quantities.items() if qty > 0}
+    if not quantities:
+        return
+
+    try:
+        with transaction.atomic():
+            updated = Inventory.objects.filter(
+                store_id=store_id,
+                part_id__in=quantities.keys(),
+                quantity_on_hand__gte=_per_part(quantities),
+            ).update(
+                quantity_on_hand=F('quantity_on_hand') - _per_part(quantities),
+                # SET expressions all see the old row, so recompute from it
+                needs_reorder=needs_reorder(F('quantity_on_hand') - _per_part(quantities)),
+            )
+
+            if updated != len(quantities):
+                raise _Rollback
+    except _Rollback:
+        # Rolled back, so these are the levels the UPDATE was checked against
+        available = dict(
+            Inventory.objects.filter(store_id=store_id, part_id__in=quantities.keys())
+            .values_list('part_id', 'quantity_on_hand')
+        )
+        raise InsufficientStock([
+            {'part_id': part_id, 'requested': qty, 'available': available.get(part_id, 0)}
+            for part_id, qty in quantities.items()
+            if available.get(part_id, 0) < qty
+        ])
+
+
+def receive_purchase_order(po_id):
+    """
+    Mark a purchase order RECEIVED and add its lines to the store's stock,
+    in two statements however many lines it has. Returns False if the PO
+    was already received; concurrent calls for the same PO wait on its row
+    lock, so only one of them adds the stock.
+    """
+    with transaction.atomic():
+        claimed = (
+            PurchaseOrder.objects.filter(pk=po_id)
+            .exclude(status='RECEIVED')
+            .update(status='RECEIVED')
+        )
+        if not claimed:
+            return False
+
+        qn = connection.ops.quote_name
+        inventory = qn(Inventory._meta.db_table)
+        part = qn(AutoPart._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {inventory} (store_id, part_id, quantity_on_hand, needs_reorder)
+                SELECT po.store_id, line.part_id, SUM(line.quantity), SUM(line.quantity) <= part.reorder_level
+                FROM {qn(POLineItem._meta.db_table)} line
+                JOIN {qn(PurchaseOrder._meta.db_table)} po ON po.po_id = line.purchase_order_id
+                JOIN {part} part ON part.part_id = line.part_id
+                WHERE line.purchase_order_id = %s
+                GROUP BY po.store_id, line.part_id, part.reorder_level
+                ON CONFLICT (store_id, part_id)
+                DO UPDATE SET
+                    quantity_on_hand = {inventory}.quantity_on_hand + excluded.quantity_on_hand,
+                    needs_reorder = {inventory}.quantity_on_hand + excluded.quantity_on_hand
+                        <= (SELECT reorder_level FROM {part} WHERE part_id = excluded.part_id)
+                """,
+                [po_id],
+            )
+    return True
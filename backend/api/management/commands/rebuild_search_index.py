@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from api import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the part search index (needed after bulk imports that skip model signals)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if search.uses_native_search():
+            self.stdout.write("PostgreSQL full-text index is maintained by the database, nothing to do.")
+            return
+
+        count = search.rebuild_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} parts"))
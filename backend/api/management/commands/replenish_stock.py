@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from api import replenishment
+
+
+class Command(BaseCommand):
+    help = "Create purchase orders for every inventory row at or below its reorder level"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--store', type=int, help="Only replenish this store")
+        parser.add_argument('--dry-run', action='store_true', help="Report what would be ordered without creating POs")
+
+    def handle(self, *args, **options):
+        summary = replenishment.replenish(store_id=options['store'], dry_run=options['dry_run'])
+
+        if summary['unsourced_count']:
+            parts = ', '.join(f"{row['part_id']}@{row['store_id']}" for row in summary['unsourced'])
+            self.stdout.write(self.style.WARNING(
+                f"Skipped {summary['unsourced_count']} rows with no supplier (part@store): {parts}"
+            ))
+
+        verb = "Would order" if summary['dry_run'] else "Ordered"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {summary['units']} units over {summary['lines']} lines "
+            f"in {len(summary['purchase_orders'])} purchase orders"
+        ))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api import totals
+
+
+class Command(BaseCommand):
+    help = "Recompute stored order totals from their items, or report drift with --check"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help="Only report orders whose stored totals are wrong; exit non-zero if any are")
+
+    def handle(self, *args, **options):
+        if options['check']:
+            self.check_drift()
+            return
+
+        # Only drifted rows are rewritten, so in-sync orders keep their updated_at
+        orders = totals.refresh_order_totals([row['pk'] for row in totals.order_drift()])
+        pos = totals.refresh_po_totals([row['pk'] for row in totals.po_drift()])
+        self.stdout.write(self.style.SUCCESS(f"Updated {orders} customer orders and {pos} purchase orders"))
+
+    def check_drift(self):
+        drifted = 0
+        for label, rows in (('Order', totals.order_drift()), ('PO', totals.po_drift())):
+            for row in rows:
+                drifted += 1
+                self.stdout.write(
+                    f"{label}-{row['pk']}: stored {row['total_amount']} / {row['item_count']} lines, "
+                    f"actual {row['actual_total']} / {row['actual_count']} lines"
+                )
+        if drifted:
+            raise CommandError(f"{drifted} orders have drifted; run sync_order_totals to fix them")
+        self.stdout.write(self.style.SUCCESS("All stored order totals match their items"))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from api.inventory import refresh_reorder_flags
+from api.models import Inventory
+
+
+class Command(BaseCommand):
+    help = "Recompute Inventory.needs_reorder (needed after bulk loads that skip model saves and signals)"
+
+    def handle(self, *args, **options):
+        count = refresh_reorder_flags(Inventory.objects.all())
+        flagged = Inventory.objects.filter(needs_reorder=True).count()
+        self.stdout.write(self.style.SUCCESS(f"Checked {count} inventory rows, {flagged} need reordering"))
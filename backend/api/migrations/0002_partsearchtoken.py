@@ -0,0 +1,74 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:39
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Keep in sync with api.search.PG_VECTOR_SQL
+PG_VECTOR_SQL = (
+    "to_tsvector('simple', coalesce(part.sku, '') || ' ' || "
+    "coalesce(part.name, '') || ' ' || coalesce(part.category, ''))"
+)
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS part_search_vector_idx ON part USING gin (({PG_VECTOR_SQL}))"
+        )
+        return
+
+    # Populate the token table for parts that already exist
+    from api.search import part_tokens
+
+    AutoPart = apps.get_model("api", "AutoPart")
+    PartSearchToken = apps.get_model("api", "PartSearchToken")
+    rows = [
+        PartSearchToken(part_id=part.pk, token=token, weight=weight)
+        for part in AutoPart.objects.all().iterator()
+        for token, weight in part_tokens(part).items()
+    ]
+    PartSearchToken.objects.bulk_create(rows, batch_size=1000)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS part_search_vector_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PartSearchToken",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("token", models.CharField(max_length=50)),
+                ("weight", models.PositiveSmallIntegerField(default=1)),
+                (
+                    "part",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="search_tokens",
+                        to="api.autopart",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "part_search_token",
+                "unique_together": {("token", "part")},
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
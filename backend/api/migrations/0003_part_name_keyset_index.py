@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0002_partsearchtoken"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="autopart",
+            name="part_name_880c73_idx",
+        ),
+        migrations.AddIndex(
+            model_name="autopart",
+            index=models.Index(fields=["name", "part_id"], name="part_name_ce6d6a_idx"),
+        ),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_categories(apps, schema_editor):
+    """Create categories from the free-text AutoPart.category values and link the parts"""
+    from api.models import TOP_LEVEL_CATEGORIES, category_slug, parent_category_slug
+
+    Category = apps.get_model("api", "Category")
+    AutoPart = apps.get_model("api", "AutoPart")
+
+    for slug, label, _ in TOP_LEVEL_CATEGORIES:
+        Category.objects.get_or_create(slug=slug, defaults={"name": label})
+
+    texts = AutoPart.objects.values_list("category", flat=True).distinct()
+    for text in texts:
+        slug = category_slug(text)
+        parent_slug = parent_category_slug(text)
+        Category.objects.get_or_create(
+            slug=slug,
+            defaults={
+                "name": text.strip() or "Uncategorized",
+                "parent_id": (
+                    Category.objects.get(slug=parent_slug).pk if parent_slug else None
+                ),
+            },
+        )
+        AutoPart.objects.filter(category=text).update(category_ref_id=slug)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0003_part_name_keyset_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Category",
+            fields=[
+                ("category_id", models.AutoField(primary_key=True, serialize=False)),
+                ("slug", models.SlugField(max_length=100, unique=True)),
+                ("name", models.CharField(max_length=100)),
+            ],
+            options={
+                "verbose_name_plural": "categories",
+                "db_table": "category",
+            },
+        ),
+        migrations.AddField(
+            model_name="category",
+            name="parent",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="children",
+                to="api.category",
+            ),
+        ),
+        migrations.AddField(
+            model_name="autopart",
+            name="category_ref",
+            field=models.ForeignKey(
+                blank=True,
+                db_column="category_slug",
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="parts",
+                to="api.category",
+                to_field="slug",
+            ),
+        ),
+        migrations.RunPython(backfill_categories, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="autopart",
+            index=models.Index(
+                fields=["category_ref", "name", "part_id"],
+                name="part_categor_59cadd_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:51
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def backfill_totals(apps, schema_editor):
+    """Fill the stored totals from the existing order and purchase order lines"""
+    from django.db.models import Count, F, OuterRef, Subquery, Sum, Value
+    from django.db.models.functions import Coalesce
+
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    targets = [
+        ("CustomerOrder", "OrderItem", "order", "unit_price"),
+        ("PurchaseOrder", "POLineItem", "purchase_order", "unit_cost"),
+    ]
+    for parent_name, child_name, parent_field, price_field in targets:
+        Parent = apps.get_model("api", parent_name)
+        Child = apps.get_model("api", child_name)
+        children = Child.objects.filter(**{parent_field: OuterRef("pk")}).values(
+            parent_field
+        )
+        total = children.annotate(
+            value=Sum(F("quantity") * F(price_field), output_field=amount)
+        ).values("value")
+        count = children.annotate(value=Count("pk")).values("value")
+        Parent.objects.update(
+            total_amount=Coalesce(
+                Subquery(total), Value(Decimal("0.00")), output_field=amount
+            ),
+            item_count=Coalesce(Subquery(count), Value(0)),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0004_category"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="customerorder",
+            name="item_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="customerorder",
+            name="total_amount",
+            field=models.DecimalField(
+                decimal_places=2, default=Decimal("0.00"), max_digits=12
+            ),
+        ),
+        migrations.AddField(
+            model_name="purchaseorder",
+            name="item_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="purchaseorder",
+            name="total_amount",
+            field=models.DecimalField(
+                decimal_places=2, default=Decimal("0.00"), max_digits=12
+            ),
+        ),
+        migrations.RunPython(backfill_totals, migrations.RunPython.noop),
+    ]
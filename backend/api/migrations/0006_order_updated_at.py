@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:52
+
+from django.db import migrations, models
+
+
+def backfill_updated_at(apps, schema_editor):
+    """Existing orders have not changed since they were placed as far as we know"""
+    from django.db.models import F
+
+    CustomerOrder = apps.get_model("api", "CustomerOrder")
+    CustomerOrder.objects.update(updated_at=F("order_date"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0005_order_totals"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="customerorder",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="customerorder",
+            index=models.Index(
+                fields=["store", "updated_at"], name="customer_or_store_i_1bdf54_idx"
+            ),
+        ),
+    ]
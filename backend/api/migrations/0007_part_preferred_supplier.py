@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0006_order_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="autopart",
+            name="preferred_supplier",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="preferred_parts",
+                to="api.supplier",
+            ),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:01
+
+from django.db import migrations, models
+
+
+def backfill_needs_reorder(apps, schema_editor):
+    """Flag existing rows at or below their part's reorder level"""
+    from django.db.models import F, OuterRef, Subquery
+    from django.db.models.lookups import LessThanOrEqual
+
+    Inventory = apps.get_model("api", "Inventory")
+    AutoPart = apps.get_model("api", "AutoPart")
+    reorder_level = AutoPart.objects.filter(pk=OuterRef("part_id")).values(
+        "reorder_level"
+    )[:1]
+    Inventory.objects.update(
+        needs_reorder=LessThanOrEqual(F("quantity_on_hand"), Subquery(reorder_level))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0007_part_preferred_supplier"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="inventory",
+            name="needs_reorder",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(backfill_needs_reorder, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="inventory",
+            index=models.Index(
+                condition=models.Q(("needs_reorder", True)),
+                fields=["store", "id"],
+                name="inventory_needs_reorder_idx",
+            ),
+        ),
+    ]
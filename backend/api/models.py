@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth.hashers import make_password, check_password
 from django.core.validators import MinValueValidator
+from django.utils.text import slugify
 from decimal import Decimal
 
 class Store(models.Model):
@@ -104,6 +105,64 @@ class Supplier(models.Model):
         return self.name
 
 
+# Top-level catalog categories: (slug, label, keyword matched in free-text categories)
+TOP_LEVEL_CATEGORIES = [
+    ('engine-parts', 'Engine Parts', 'engine'),
+    ('brakes', 'Brakes', 'brake'),
+    ('suspension', 'Suspension', 'suspension'),
+    ('electrical', 'Electrical', 'electrical'),
+    ('exhaust', 'Exhaust', 'exhaust'),
+    ('body-parts', 'Body Parts', 'body'),
+]
+
+
+def category_slug(text):
+    """Slug for a free-text category, e.g. 'Brake Pads' -> 'brake-pads'"""
+    return slugify(text or '')[:100] or 'uncategorized'
+
+
+def parent_category_slug(text):
+    """Top-level category a free-text category belongs under (None if it is one)"""
+    slug = category_slug(text)
+    lowered = (text or '').lower()
+    for top_slug, _, keyword in TOP_LEVEL_CATEGORIES:
+        if slug == top_slug:
+            return None
+        if keyword in lowered:
+            return top_slug
+    return None
+
+
+class Category(models.Model):
+    category_id = models.AutoField(primary_key=True)
+    slug = models.SlugField(max_length=100, unique=True)
+    name = models.CharField(max_length=100)
+    parent = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='children')
+    
+    class Meta:
+        db_table = 'category'
+        verbose_name_plural = 'categories'
+    
+    @classmethod
+    def resolve(cls, text):
+        """
+        Slug of the category for free-text `text`, creating the row (and its
+        parent) if needed. Only runs when a part's category changes, so the
+        lookup is not cached: a cached slug could outlive a rolled-back row.
+        """
+        slug = category_slug(text)
+        parent_slug = parent_category_slug(text)
+        parent = None
+        if parent_slug:
+            label = next(label for top, label, _ in TOP_LEVEL_CATEGORIES if top == parent_slug)
+            parent, _ = cls.objects.get_or_create(slug=parent_slug, defaults={'name': label})
+        cls.objects.get_or_create(slug=slug, defaults={'name': (text or '').strip() or 'Uncategorized', 'parent': parent})
+        return slug
+    
+    def __str__(self):
+        return self.name
+
+
 class AutoPart(models.Model):
     CONDITION_CHOICES = [
         ('NEW', 'New'),
@@ -115,26 +174,63 @@ class AutoPart(models.Model):
     sku = models.CharField(max_length=50, unique=True)
     name = models.CharField(max_length=200)
     category = models.CharField(max_length=100)
+    # Normalized category derived from `category` on save; filters use this exact slug
+    category_ref = models.ForeignKey(
+        Category, to_field='slug', db_column='category_slug', db_index=False,
+        on_delete=models.SET_NULL, null=True, blank=True, related_name='parts'
+    )
     condition = models.CharField(max_length=20, choices=CONDITION_CHOICES)
     unit_price = models.DecimalField(max_digits=10, decimal_places=2, validators=[MinValueValidator(Decimal('0.01'))])
     reorder_level = models.IntegerField(validators=[MinValueValidator(0)])
+    # Replenishment falls back to the supplier of the part's latest PO when unset
+    preferred_supplier = models.ForeignKey(
+        Supplier, on_delete=models.SET_NULL, null=True, blank=True, related_name='preferred_parts'
+    )
     
     class Meta:
         db_table = 'part'
         indexes = [
             models.Index(fields=['category']),
             models.Index(fields=['sku']),
-            models.Index(fields=['name']),
+            # (name, part_id) doubles as the keyset pagination order for catalog pages
+            models.Index(fields=['name', 'part_id']),
+            models.Index(fields=['category_ref', 'name', 'part_id']),
         ]
     
+    def save(self, *args, **kwargs):
+        slug = category_slug(self.category)
+        if self.category_ref_id != slug:
+            self.category_ref_id = Category.resolve(self.category)
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'category' in update_fields:
+                kwargs['update_fields'] = {*update_fields, 'category_ref'}
+        super().save(*args, **kwargs)
+    
     def __str__(self):
         return f"{self.sku} - {self.name}"
 
 
+class PartSearchToken(models.Model):
+    """Inverted index row used for part search on databases without native full-text search"""
+    part = models.ForeignKey(AutoPart, on_delete=models.CASCADE, related_name='search_tokens')
+    token = models.CharField(max_length=50)
+    weight = models.PositiveSmallIntegerField(default=1)
+    
+    class Meta:
+        db_table = 'part_search_token'
+        unique_together = ('token', 'part')
+    
+    def __str__(self):
+        return f"{self.token} -> {self.part_id}"
+
+
 class Inventory(models.Model):
     store = models.ForeignKey(Store, on_delete=models.CASCADE)
     part = models.ForeignKey(AutoPart, on_delete=models.CASCADE)
     quantity_on_hand = models.IntegerField(validators=[MinValueValidator(0)])
+    # quantity_on_hand <= part.reorder_level, kept in sync on every stock or
+    # reorder level write (see api.inventory.refresh_reorder_flags)
+    needs_reorder = models.BooleanField(default=False)
     
     class Meta:
         db_table = 'inventory'
@@ -142,8 +238,18 @@ class Inventory(models.Model):
         indexes = [
             models.Index(fields=['store', 'part']),
             models.Index(fields=['quantity_on_hand']),
+            # Only low-stock rows, so low-stock lookups scan just those
+            models.Index(fields=['store', 'id'], condition=models.Q(needs_reorder=True),
+                         name='inventory_needs_reorder_idx'),
         ]
     
+    def save(self, *args, **kwargs):
+        self.needs_reorder = self.quantity_on_hand <= self.part.reorder_level
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'quantity_on_hand' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'needs_reorder'}
+        super().save(*args, **kwargs)
+    
     def __str__(self):
         return f"{self.store.name} - {self.part.name}: {self.quantity_on_hand}"
 
@@ -162,6 +268,9 @@ class PurchaseOrder(models.Model):
     order_date = models.DateField(auto_now_add=True)
     expected_date = models.DateField()
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    # Maintained from the line items by api.totals
+    total_amount = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    item_count = models.PositiveIntegerField(default=0)
     
     class Meta:
         db_table = 'purchase_order'
@@ -205,16 +314,22 @@ class CustomerOrder(models.Model):
     store = models.ForeignKey(Store, on_delete=models.CASCADE)
     order_date = models.DateTimeField(auto_now_add=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    # Maintained from the order items by api.totals
+    total_amount = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    item_count = models.PositiveIntegerField(default=0)
+    # Bumped on every change; queryset update() calls must set it themselves
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         db_table = 'customer_order'
         indexes = [
             models.Index(fields=['customer', 'order_date']),
             models.Index(fields=['status']),
+            models.Index(fields=['store', 'updated_at']),
         ]
     
     def get_total_amount(self):
-        return sum(item.get_total_price() for item in self.items.all())
+        return self.total_amount
     
     def __str__(self):
         return f"Order-{self.order_id} - {self.customer.full_name}"
@@ -305,4 +420,33 @@ class ReturnItem(models.Model):
         ]
     
     def __str__(self):
-        return f"Return-{self.return_id} - Order-{self.order.order_id}"
\ No newline at end of file
+        return f"Return-{self.return_id} - Order-{self.order.order_id}"
+
+class IdempotencyKey(models.Model):
+    """An Idempotency-Key claimed by a request and, once it succeeded, its response"""
+    STATE_CHOICES = [
+        ('IN_FLIGHT', 'In Flight'),
+        ('DONE', 'Done'),
+    ]
+    
+    scope = models.CharField(max_length=50)
+    owner = models.CharField(max_length=50)
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    state = models.CharField(max_length=20, choices=STATE_CHOICES, default='IN_FLIGHT')
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_data = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+    
+    class Meta:
+        db_table = 'idempotency_key'
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'owner', 'key'], name='idempotency_key_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['expires_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.scope}:{self.owner}:{self.key} ({self.state})"
@@ -0,0 +1,190 @@
+"""
+Order write path shared by cart checkout and the order-creation API.
+
+An order is written in a fixed number of statements regardless of how many
+lines it has: the stock reservation, the order row (already in its final
+status and with its stored totals), one bulk insert for all items, then the
+payment and delivery rows.
+"""
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Prefetch, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .events import ORDER_CREATED, ORDER_UPDATED, publish_order_event, publish_order_events
+from .inventory import reserve_stock
+from .models import CustomerOrder, Delivery, OrderItem, Payment
+from .pagination import cursor_values, encode_cursor, keyset_page
+
+CHANGE_ORDERING = ('updated_at', 'order_id')
+
+
+def tracking_number(order_id):
+    return f"TRK{order_id}{timezone.now().strftime('%Y%m%d%H%M')}"
+
+
+def merge_lines(lines):
+    """Collapse (part_id, qty, price) lines that point at the same part"""
+    merged = {}
+    for part_id, qty, price in lines:
+        if part_id in merged:
+            _, prev_qty, prev_price = merged[part_id]
+            merged[part_id] = (part_id, prev_qty + qty, prev_price)
+        else:
+            merged[part_id] = (part_id, qty, price)
+    return list(merged.values())
+
+
+def place_order(customer_id, store, lines, payment_method, card_last_four_digit=''):
+    """
+    Reserve stock at `store` and create a PROCESSING order with its items,
+    payment and delivery. `lines` is a list of (part_id, quantity, unit_price).
+    Returns (order, total); raises InsufficientStock if the store cannot
+    cover every line, in which case nothing is written.
+    """
+    lines = merge_lines(lines)
+    total = sum((price * qty for _, qty, price in lines), Decimal('0.00'))
+
+    with transaction.atomic():
+        reserve_stock(store.pk, {part_id: qty for part_id, qty, _ in lines})
+
+        order = CustomerOrder.objects.create(
+            customer_id=customer_id,
+            store=store,
+            status='PROCESSING',
+            total_amount=total,
+            item_count=len(lines),
+        )
+
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, part_id=part_id, quantity=qty, unit_price=price)
+            for part_id, qty, price in lines
+        ])
+
+        Payment.objects.create(
+            order=order,
+            payment_method=payment_method,
+            amount=total,
+            card_last_four_digit=card_last_four_digit,
+            authentication_code=str(uuid.uuid4())[:12],
+        )
+
+        Delivery.objects.create(
+            order=order,
+            tracking_number=tracking_number(order.order_id),
+            delivery_status='PREPARING',
+        )
+
+        publish_order_event(order, ORDER_CREATED)
+
+    return order, total
+
+
+def bulk_update_status(order_ids, new_status=None, delivery_status=None, employee=None):
+    """
+    Apply the same order status / delivery status / employee change to many
+    orders with one read and one UPDATE per table, whatever the batch size.
+    Ship and delivery dates are filled in as update_status does.
+    Returns {order_id: 'updated' | 'unchanged' | 'not_found'}.
+    """
+    today = timezone.now().date()
+    employee_id = employee.pk if employee else None
+
+    with transaction.atomic():
+        rows = CustomerOrder.objects.filter(pk__in=order_ids).values_list(
+            'order_id', 'store_id', 'status',
+            'delivery__delivery_id', 'delivery__delivery_status', 'delivery__employee_id',
+        )
+
+        changed = {}  # order_id -> (store_id, status after the change)
+        missing_delivery = []
+        found = set()
+        for order_id, store_id, order_status, delivery_id, current_delivery, current_employee in rows:
+            found.add(order_id)
+            if (
+                (new_status and order_status != new_status)
+                or (delivery_status and current_delivery != delivery_status)
+                or (employee_id and current_employee != employee_id)
+            ):
+                changed[order_id] = (store_id, new_status or order_status)
+                if delivery_id is None:
+                    missing_delivery.append(order_id)
+
+        if changed:
+            # updated_at moves for every changed order, including delivery-
+            # or employee-only changes, so the by_store?since= feed sees them
+            order_changes = {'updated_at': timezone.now()}
+            if new_status:
+                order_changes['status'] = new_status
+            CustomerOrder.objects.filter(pk__in=changed).update(**order_changes)
+
+            Delivery.objects.bulk_create([
+                Delivery(order_id=order_id, tracking_number=tracking_number(order_id))
+                for order_id in missing_delivery
+            ])
+
+            delivery_changes = {}
+            if delivery_status:
+                delivery_changes['delivery_status'] = delivery_status
+            if employee_id:
+                delivery_changes['employee_id'] = employee_id
+            if new_status == 'SHIPPED':
+                delivery_changes['ship_date'] = Coalesce('ship_date', Value(today))
+            if new_status == 'DELIVERED':
+                delivery_changes['delivery_date'] = Coalesce('delivery_date', Value(today))
+            if delivery_changes:
+                Delivery.objects.filter(order_id__in=changed).update(**delivery_changes)
+
+            publish_order_events(
+                [(store_id, order_id, order_status) for order_id, (store_id, order_status) in changed.items()],
+                ORDER_UPDATED,
+            )
+
+    return {
+        order_id: 'updated' if order_id in changed else 'unchanged' if order_id in found else 'not_found'
+        for order_id in order_ids
+    }
+
+
+def history_queryset(customer_id):
+    """A customer's orders with everything CustomerOrderSerializer reads loaded up front"""
+    return (
+        CustomerOrder.objects.filter(customer_id=customer_id)
+        .select_related('customer', 'store')
+        .prefetch_related(Prefetch('items', queryset=OrderItem.objects.select_related('part')))
+    )
+
+
+def _settled_before():
+    return timezone.now() - timedelta(seconds=settings.ORDER_FEED_LAG)
+
+
+def initial_change_cursor():
+    """Cursor for a client that has just loaded the full order list"""
+    return encode_cursor([_settled_before(), 0])
+
+
+def changed_orders(orders, cursor, limit):
+    """
+    Orders changed after `cursor`, oldest change first, at most `limit`.
+    Returns (rows, next_cursor), or None if the cursor is missing/invalid.
+
+    updated_at is stamped before the writing transaction commits, so the
+    cursor is never moved past ORDER_FEED_LAG seconds ago: a change that
+    commits a little late is still picked up, and very recent changes may be
+    sent twice, which clients handle by replacing rows by order_id.
+    """
+    if cursor_values(orders, CHANGE_ORDERING, cursor) is None:
+        return None
+
+    rows, _ = keyset_page(orders, CHANGE_ORDERING, cursor=cursor, page_size=limit)
+    settled_before = _settled_before()
+    settled = [row for row in rows if row.updated_at <= settled_before]
+    if settled:
+        cursor = encode_cursor([settled[-1].updated_at, settled[-1].order_id])
+    return rows, cursor
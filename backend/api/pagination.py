@@ -0,0 +1,105 @@
+"""
+Keyset (seek) pagination helpers.
+
+Instead of OFFSET, each page remembers the ordering values of its last row
+in an opaque cursor and the next page starts strictly after them, so every
+page costs the same index range scan no matter how deep the client scrolls.
+"""
+import base64
+import datetime
+import json
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+
+class _CursorEncoder(DjangoJSONEncoder):
+    def default(self, o):
+        # DjangoJSONEncoder cuts datetimes to milliseconds, which would skip
+        # rows that differ from the cursor only in the microseconds
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(values):
+    raw = json.dumps(list(values), cls=_CursorEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    """Return the list of ordering values in `cursor`, or None if it is missing/invalid"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or len(values) != size:
+        return None
+    return values
+
+
+def cursor_values(queryset, ordering, cursor):
+    """
+    The values in `cursor` converted to the types of the `ordering` fields
+    (model fields or annotations of `queryset`), or None if the cursor is
+    missing, malformed or holds values those fields cannot take.
+    """
+    fields = [name.lstrip('-') for name in ordering]
+    values = decode_cursor(cursor, len(fields))
+    if values is None:
+        return None
+
+    annotations = queryset.query.annotations
+    converted = []
+    for name, value in zip(fields, values):
+        field = annotations[name].output_field if name in annotations else queryset.model._meta.get_field(name)
+        try:
+            value = field.to_python(value)
+        except (ValidationError, ValueError, TypeError):
+            return None
+        if value is None:
+            return None
+        converted.append(value)
+    return converted
+
+
+def _after(ordering, values):
+    """Q selecting rows that sort after `values` for `ordering` (all fields in the same direction)"""
+    descending = ordering[0].startswith('-')
+    fields = [name.lstrip('-') for name in ordering]
+    lookup = 'lt' if descending else 'gt'
+
+    clauses = []
+    for i, field in enumerate(fields):
+        equal = {fields[j]: values[j] for j in range(i)}
+        clauses.append(Q(**equal, **{f'{field}__{lookup}': values[i]}))
+    return reduce(or_, clauses)
+
+
+def keyset_page(queryset, ordering, cursor=None, page_size=24):
+    """
+    Fetch one page of `queryset` ordered by `ordering`, which must end in a
+    unique field (e.g. ('name', 'part_id')).
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    fields = [name.lstrip('-') for name in ordering]
+    # A cursor that does not fit the ordering is treated as no cursor
+    values = cursor_values(queryset, ordering, cursor)
+
+    queryset = queryset.order_by(*ordering)
+    if values is not None:
+        queryset = queryset.filter(_after(ordering, values))
+
+    rows = list(queryset[:page_size + 1])
+    if len(rows) <= page_size:
+        return rows, None
+
+    rows = rows[:page_size]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, field) for field in fields)
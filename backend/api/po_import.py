@@ -0,0 +1,145 @@
+"""
+CSV import of purchase order line items (supplier packing lists).
+
+The file is read row by row, so memory use does not grow with its size.
+Rows are handled in chunks of CHUNK_SIZE: one query resolves the chunk's
+SKUs, then its valid lines are bulk-inserted. The whole import runs in one
+transaction and is all-or-nothing: if any row is invalid nothing is kept
+and the error report says which rows to fix.
+
+Expected columns (header row required, extra columns are ignored):
+
+    sku,quantity,unit_cost
+"""
+import csv
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from .models import AutoPart, POLineItem, PurchaseOrder
+from .totals import refresh_po_totals
+
+REQUIRED_COLUMNS = ('sku', 'quantity', 'unit_cost')
+CHUNK_SIZE = 1000
+# Errors beyond this are counted but not listed
+MAX_ERRORS_LISTED = 100
+CLOSED_STATUSES = ('RECEIVED', 'CANCELLED')
+# Column limits: IntegerField and DecimalField(max_digits=10, decimal_places=2)
+MAX_QUANTITY = 2 ** 31 - 1
+MAX_COST = Decimal('99999999.99')
+
+
+class ImportReport:
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.error_count = 0
+        self.errors = []
+
+    def error(self, row, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_ERRORS_LISTED:
+            self.errors.append({'row': row, 'error': message})
+
+    def as_dict(self):
+        return {
+            'rows': self.rows,
+            'created': self.created,
+            'error_count': self.error_count,
+            'errors': self.errors,
+        }
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _parse_quantity(value):
+    try:
+        quantity = int(value)
+    except (TypeError, ValueError):
+        return None
+    return quantity if 1 <= quantity <= MAX_QUANTITY else None
+
+
+def _parse_cost(value):
+    try:
+        cost = Decimal(value)
+    except (TypeError, InvalidOperation):
+        return None
+    if not cost.is_finite() or not Decimal('0.01') <= cost <= MAX_COST or cost != cost.quantize(Decimal('0.01')):
+        return None
+    return cost
+
+
+def import_po_lines(po_id, stream):
+    """
+    Add the lines in a CSV text stream to purchase order `po_id`.
+    Returns an ImportReport; report.created is 0 whenever there are errors.
+    """
+    report = ImportReport()
+    reader = csv.DictReader(stream)
+    header = [name.strip().lower() for name in (reader.fieldnames or [])]
+    missing = [column for column in REQUIRED_COLUMNS if column not in header]
+    if missing:
+        report.error(1, f"Missing column(s): {', '.join(missing)}")
+        return report
+    reader.fieldnames = header
+
+    try:
+        with transaction.atomic():
+            # Locked so two imports into the same PO cannot interleave
+            po = PurchaseOrder.objects.select_for_update().get(pk=po_id)
+            if po.status in CLOSED_STATUSES:
+                report.error(0, f'Purchase order is {po.status.lower()}')
+                raise _Rollback
+
+            seen_parts = set(POLineItem.objects.filter(purchase_order_id=po_id).values_list('part_id', flat=True))
+            chunk = []
+            for row in reader:
+                report.rows += 1
+                chunk.append((reader.line_num, row))
+                if len(chunk) >= CHUNK_SIZE:
+                    _import_chunk(po_id, chunk, seen_parts, report)
+                    chunk = []
+            if chunk:
+                _import_chunk(po_id, chunk, seen_parts, report)
+
+            if report.error_count:
+                raise _Rollback
+            if report.created:
+                refresh_po_totals([po_id])
+    except _Rollback:
+        report.created = 0
+    return report
+
+
+def _import_chunk(po_id, chunk, seen_parts, report):
+    skus = {(row.get('sku') or '').strip() for _, row in chunk}
+    part_ids = dict(AutoPart.objects.filter(sku__in=skus).values_list('sku', 'part_id'))
+
+    lines = []
+    for line_num, row in chunk:
+        sku = (row.get('sku') or '').strip()
+        quantity = _parse_quantity((row.get('quantity') or '').strip())
+        cost = _parse_cost((row.get('unit_cost') or '').strip())
+        part_id = part_ids.get(sku)
+
+        if not sku:
+            report.error(line_num, 'Missing SKU')
+        elif part_id is None:
+            report.error(line_num, f'Unknown SKU {sku}')
+        elif quantity is None:
+            report.error(line_num, f'Quantity must be a whole number from 1 to {MAX_QUANTITY}')
+        elif cost is None:
+            report.error(line_num, f'Unit cost must be an amount from 0.01 to {MAX_COST} with at most 2 decimals')
+        elif part_id in seen_parts:
+            report.error(line_num, f'SKU {sku} is already on this purchase order')
+        else:
+            seen_parts.add(part_id)
+            lines.append(POLineItem(purchase_order_id=po_id, part_id=part_id, quantity=quantity, unit_cost=cost))
+
+    # Once a row has failed nothing will be kept, so stop writing
+    if lines and not report.error_count:
+        POLineItem.objects.bulk_create(lines)
+        report.created += len(lines)
@@ -0,0 +1,106 @@
+"""
+Server-side cart pricing.
+
+Cart lines are always priced from AutoPart.unit_price. Prices come from an
+in-process cache keyed by part id; misses are loaded in one batched query
+and entries are dropped by the AutoPart signals when a part changes. Each
+entry also expires after PRICE_CACHE_TTL seconds, which bounds how stale
+another worker process can be.
+"""
+import threading
+import time
+from collections import namedtuple
+from decimal import Decimal
+
+from django.conf import settings
+
+from .models import AutoPart
+
+PriceEntry = namedtuple('PriceEntry', 'part_id sku name unit_price')
+PricedLine = namedtuple('PricedLine', 'key part_id name unit_price quantity line_total')
+
+
+class PriceCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}  # part_id -> (PriceEntry, expires_at)
+
+    def get_many(self, part_ids):
+        """{part_id: PriceEntry} for the ids that exist, one query for all misses"""
+        now = time.monotonic()
+        found = {}
+        misses = []
+        for part_id in set(part_ids):
+            cached = self._entries.get(part_id)
+            if cached and cached[1] > now:
+                found[part_id] = cached[0]
+            else:
+                misses.append(part_id)
+
+        if misses:
+            rows = AutoPart.objects.filter(pk__in=misses).values_list('part_id', 'sku', 'name', 'unit_price')
+            loaded = {row[0]: PriceEntry(*row) for row in rows}
+            self._store(loaded, now)
+            found.update(loaded)
+        return found
+
+    def get_many_by_sku(self, skus):
+        """{sku: PriceEntry}; SKU lookups always hit the database but fill the cache"""
+        rows = AutoPart.objects.filter(sku__in=set(skus)).values_list('part_id', 'sku', 'name', 'unit_price')
+        loaded = {row[0]: PriceEntry(*row) for row in rows}
+        self._store(loaded, time.monotonic())
+        return {entry.sku: entry for entry in loaded.values()}
+
+    def _store(self, entries, now):
+        expires_at = now + settings.PRICE_CACHE_TTL
+        with self._lock:
+            if len(self._entries) + len(entries) > settings.PRICE_CACHE_MAX_ENTRIES:
+                self._entries.clear()
+            for part_id, entry in entries.items():
+                self._entries[part_id] = (entry, expires_at)
+
+    def invalidate(self, part_id):
+        with self._lock:
+            self._entries.pop(part_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+price_cache = PriceCache()
+
+
+def resolve_keys(keys):
+    """
+    {cart_key: PriceEntry} for cart keys given as part ids or (older carts) SKUs.
+    Unknown keys are left out.
+    """
+    keys = {str(key).strip() for key in keys}
+    by_id = price_cache.get_many(int(key) for key in keys if key.isdigit())
+    resolved = {str(part_id): entry for part_id, entry in by_id.items()}
+
+    leftover = [key for key in keys if key not in resolved]
+    if leftover:
+        resolved.update(price_cache.get_many_by_sku(leftover))
+    return resolved
+
+
+def price_cart(quantities):
+    """
+    Price every line of a {cart_key: quantity} cart.
+    Returns (lines, unresolved_keys, total) with Decimal amounts.
+    """
+    entries = resolve_keys(quantities.keys())
+    lines = []
+    unresolved = []
+    total = Decimal('0.00')
+    for key, quantity in quantities.items():
+        entry = entries.get(str(key).strip())
+        if entry is None:
+            unresolved.append(key)
+            continue
+        line_total = entry.unit_price * quantity
+        total += line_total
+        lines.append(PricedLine(key, entry.part_id, entry.name, entry.unit_price, quantity, line_total))
+    return lines, unresolved, total
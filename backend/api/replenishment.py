@@ -0,0 +1,148 @@
+"""
+Replenishment: turn low stock into purchase orders.
+
+One query finds every inventory row flagged needs_reorder (stock at or
+below the part's reorder level), together with the supplier to order from
+and what is already on order:
+
+  supplier   AutoPart.preferred_supplier, else the supplier of the part's
+             most recent purchase order
+  on order   quantity on PENDING/APPROVED purchase orders for the same
+             store and part, so running the engine twice does not double
+             the order
+  unit cost  the part's most recent PO unit cost, else its unit price
+
+Each row is ordered up to REPLENISH_TARGET_MULTIPLIER x reorder_level.
+Lines are grouped by (store, supplier) and written with two bulk inserts,
+one for the purchase orders and one for all their line items.
+"""
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Inventory, POLineItem, PurchaseOrder, Store
+
+OPEN_PO_STATUSES = ('PENDING', 'APPROVED')
+# Rows without a supplier are counted; only this many are listed
+UNSOURCED_LISTED = 100
+
+ReplenishmentLine = namedtuple('ReplenishmentLine', 'store_id supplier_id part_id quantity unit_cost')
+
+
+def _low_stock_rows(store_id=None):
+    latest_line = POLineItem.objects.filter(part_id=OuterRef('part_id')).order_by(
+        '-purchase_order__order_date', '-purchase_order_id'
+    )
+    on_order = (
+        POLineItem.objects.filter(
+            part_id=OuterRef('part_id'),
+            purchase_order__store_id=OuterRef('store_id'),
+            purchase_order__status__in=OPEN_PO_STATUSES,
+        )
+        .values('part_id')
+        .annotate(total=Sum('quantity'))
+        .values('total')
+    )
+
+    rows = Inventory.objects.filter(needs_reorder=True)
+    if store_id is not None:
+        rows = rows.filter(store_id=store_id)
+
+    return rows.annotate(
+        supplier_id=Coalesce(
+            'part__preferred_supplier_id',
+            Subquery(latest_line.values('purchase_order__supplier_id')[:1]),
+            output_field=IntegerField(),
+        ),
+        on_order=Coalesce(Subquery(on_order), Value(0), output_field=IntegerField()),
+        last_cost=Subquery(latest_line.values('unit_cost')[:1]),
+    ).values_list(
+        'store_id', 'part_id', 'quantity_on_hand', 'part__reorder_level',
+        'supplier_id', 'on_order', 'last_cost', 'part__unit_price',
+    )
+
+
+def plan(store_id=None):
+    """
+    Work out what to order without writing anything.
+    Returns (lines, unsourced): ReplenishmentLine tuples, and
+    (store_id, part_id) pairs that need stock but have no known supplier.
+    """
+    multiplier = settings.REPLENISH_TARGET_MULTIPLIER
+    lines = []
+    unsourced = []
+    for row in _low_stock_rows(store_id).iterator(chunk_size=5000):
+        row_store, part_id, on_hand, reorder_level, supplier_id, on_order, last_cost, unit_price = row
+        quantity = max(reorder_level * multiplier, 1) - on_hand - on_order
+        if quantity <= 0:
+            continue
+        if supplier_id is None:
+            unsourced.append((row_store, part_id))
+            continue
+        lines.append(ReplenishmentLine(row_store, supplier_id, part_id, quantity, last_cost or unit_price))
+    return lines, unsourced
+
+
+def create_purchase_orders(lines):
+    """Bulk-create one PENDING purchase order per (store, supplier) with its lines"""
+    groups = defaultdict(list)
+    for line in lines:
+        groups[(line.store_id, line.supplier_id)].append(line)
+    if not groups:
+        return []
+
+    expected_date = timezone.now().date() + timedelta(days=settings.REPLENISH_LEAD_DAYS)
+    with transaction.atomic():
+        # Stored totals are set here because bulk_create skips the line item signals
+        pos = PurchaseOrder.objects.bulk_create([
+            PurchaseOrder(
+                store_id=store_id,
+                supplier_id=supplier_id,
+                expected_date=expected_date,
+                status='PENDING',
+                total_amount=sum((line.quantity * line.unit_cost for line in group), Decimal('0.00')),
+                item_count=len(group),
+            )
+            for (store_id, supplier_id), group in groups.items()
+        ])
+        POLineItem.objects.bulk_create(
+            [
+                POLineItem(purchase_order=po, part_id=line.part_id, quantity=line.quantity, unit_cost=line.unit_cost)
+                for po, group in zip(pos, groups.values())
+                for line in group
+            ],
+            batch_size=1000,
+        )
+    return pos
+
+
+def replenish(store_id=None, dry_run=False):
+    """Plan and (unless dry_run) create purchase orders; returns a summary dict"""
+    if dry_run:
+        lines, unsourced = plan(store_id)
+        pos = []
+    else:
+        with transaction.atomic():
+            # Concurrent runs for the same stores queue here, and the later
+            # one then sees the earlier one's orders as already on order
+            stores = Store.objects.select_for_update()
+            if store_id is not None:
+                stores = stores.filter(pk=store_id)
+            list(stores.values_list('pk', flat=True))
+
+            lines, unsourced = plan(store_id)
+            pos = create_purchase_orders(lines)
+    return {
+        'dry_run': dry_run,
+        'lines': len(lines),
+        'units': sum(line.quantity for line in lines),
+        'purchase_orders': [po.po_id for po in pos],
+        'unsourced_count': len(unsourced),
+        'unsourced': [{'store_id': s, 'part_id': p} for s, p in unsourced[:UNSOURCED_LISTED]],
+    }
@@ -0,0 +1,161 @@
+"""
+Part search backed by a maintained index instead of icontains scans.
+
+On PostgreSQL the part table carries a GIN expression index over a
+tsvector of sku/name/category (see migration 0002), so queries go
+straight to native full-text search. Every other backend uses the
+part_search_token inverted index, which is rewritten from the AutoPart
+post_save signal (rows of deleted parts go away with the FK cascade).
+"""
+import re
+from functools import reduce
+from operator import and_, or_
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import (
+    BooleanField, Case, FloatField, IntegerField, Max, OuterRef, Q,
+    Subquery, Sum, Value, When,
+)
+from django.db.models.expressions import RawSQL
+
+from .models import AutoPart, PartSearchToken
+
+# Must stay identical to the expression used by the GIN index in
+# migration 0002, otherwise PostgreSQL will not use the index.
+PG_VECTOR_SQL = (
+    "to_tsvector('simple', coalesce(part.sku, '') || ' ' || "
+    "coalesce(part.name, '') || ' ' || coalesce(part.category, ''))"
+)
+
+# Higher weight wins when a token shows up in more than one field
+SKU_WEIGHT = 4
+NAME_WEIGHT = 3
+CATEGORY_WEIGHT = 1
+
+MAX_TOKEN_LENGTH = 50
+# Upper bound used to turn a prefix into an index-friendly range scan
+PREFIX_SENTINEL = '\uffff'
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def index_enabled():
+    """Whether the search entry points should use the index at all"""
+    return getattr(settings, 'PART_SEARCH_USE_INDEX', True)
+
+
+def uses_native_search():
+    return connection.vendor == 'postgresql'
+
+
+def tokenize(text):
+    """Lowercase alphanumeric tokens, e.g. 'AP-100 Brake' -> ['ap', '100', 'brake']"""
+    return [t[:MAX_TOKEN_LENGTH] for t in TOKEN_RE.findall((text or '').lower())]
+
+
+def part_tokens(part):
+    """Map each token of a part to its weight"""
+    weights = {}
+    fields = (
+        (part.category, CATEGORY_WEIGHT),
+        (part.name, NAME_WEIGHT),
+        (part.sku, SKU_WEIGHT),
+    )
+    for text, weight in fields:
+        for token in tokenize(text):
+            weights[token] = max(weights.get(token, 0), weight)
+
+    # Also index the SKU without separators so 'AP100245' finds 'AP-100245'
+    compact_sku = ''.join(tokenize(part.sku))
+    if compact_sku:
+        weights[compact_sku[:MAX_TOKEN_LENGTH]] = SKU_WEIGHT
+    return weights
+
+
+def index_part(part):
+    """Replace the index rows of a single part"""
+    if uses_native_search():
+        return
+    with transaction.atomic():
+        PartSearchToken.objects.filter(part_id=part.pk).delete()
+        PartSearchToken.objects.bulk_create([
+            PartSearchToken(part_id=part.pk, token=token, weight=weight)
+            for token, weight in part_tokens(part).items()
+        ])
+
+
+def rebuild_index(batch_size=1000):
+    """Rebuild the whole inverted index, returns the number of parts indexed"""
+    if uses_native_search():
+        return 0
+
+    count = 0
+    with transaction.atomic():
+        PartSearchToken.objects.all().delete()
+        rows = []
+        for part in AutoPart.objects.only('part_id', 'sku', 'name', 'category').iterator(chunk_size=batch_size):
+            count += 1
+            rows.extend(
+                PartSearchToken(part_id=part.pk, token=token, weight=weight)
+                for token, weight in part_tokens(part).items()
+            )
+            if len(rows) >= batch_size:
+                PartSearchToken.objects.bulk_create(rows)
+                rows = []
+        PartSearchToken.objects.bulk_create(rows)
+    return count
+
+
+def _prefix(token):
+    return Q(token__gte=token, token__lt=token + PREFIX_SENTINEL)
+
+
+def search_parts(query, parts=None):
+    """
+    Return `parts` (default: all parts) restricted to matches for `query`,
+    annotated with `search_rank` and ordered best match first.
+    Every query term must match, and terms match as prefixes so results
+    keep up while the user is typing.
+    """
+    if parts is None:
+        parts = AutoPart.objects.all()
+
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not terms:
+        return parts.none()
+
+    if uses_native_search():
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        return parts.filter(
+            RawSQL(f"{PG_VECTOR_SQL} @@ to_tsquery('simple', %s)", [tsquery], output_field=BooleanField())
+        ).annotate(
+            search_rank=RawSQL(f"ts_rank({PG_VECTOR_SQL}, to_tsquery('simple', %s))", [tsquery], output_field=FloatField())
+        ).order_by('-search_rank', 'name')
+
+    # One aggregate over the matching index rows: a part is a hit when
+    # every term matched at least one of its tokens
+    matched = {
+        f'term_{i}': Max(Case(When(_prefix(term), then=Value(1)), default=Value(0), output_field=IntegerField()))
+        for i, term in enumerate(terms)
+    }
+    hits = (
+        PartSearchToken.objects
+        .filter(reduce(or_, (_prefix(term) for term in terms)))
+        .values('part_id')
+        .annotate(score=Sum('weight'), **matched)
+        .filter(reduce(and_, (Q(**{name: 1}) for name in matched)))
+    )
+
+    return parts.filter(
+        part_id__in=hits.values('part_id')
+    ).annotate(
+        search_rank=Subquery(hits.filter(part_id=OuterRef('part_id')).values('score')[:1])
+    ).order_by('-search_rank', 'name')
+
+
+def basic_search(query, parts=None, fields=('name', 'sku', 'category')):
+    """Unindexed icontains search, used when the index is switched off"""
+    if parts is None:
+        parts = AutoPart.objects.all()
+    return parts.filter(reduce(or_, (Q(**{f'{field}__icontains': query}) for field in fields)))
@@ -72,6 +72,9 @@ class SupplierSerializer(serializers.ModelSerializer):
 
 
 class AutoPartSerializer(serializers.ModelSerializer):
+    # Derived from `category` on save; read the slug column directly (no join)
+    category_ref = serializers.CharField(source='category_ref_id', read_only=True)
+    
     class Meta:
         model = AutoPart
         fields = '__all__'
@@ -84,15 +87,12 @@ class InventorySerializer(serializers.ModelSerializer):
     part_price = serializers.DecimalField(source='part.unit_price', max_digits=10, 
                                           decimal_places=2, read_only=True)
     reorder_level = serializers.IntegerField(source='part.reorder_level', read_only=True)
-    needs_reorder = serializers.SerializerMethodField()
     
     class Meta:
         model = Inventory
         fields = ['id', 'store', 'store_name', 'part', 'part_name', 'part_sku', 
                   'part_price', 'quantity_on_hand', 'reorder_level', 'needs_reorder']
-    
-    def get_needs_reorder(self, obj):
-        return obj.quantity_on_hand <= obj.part.reorder_level
+        read_only_fields = ['needs_reorder']
 
 
 class POLineItemSerializer(serializers.ModelSerializer):
@@ -112,16 +112,23 @@ class PurchaseOrderSerializer(serializers.ModelSerializer):
     line_items = POLineItemSerializer(many=True, read_only=True)
     store_name = serializers.CharField(source='store.name', read_only=True)
     supplier_name = serializers.CharField(source='supplier.name', read_only=True)
-    total_amount = serializers.SerializerMethodField()
+    # A number in JSON, as it was when it was computed per request
+    total_amount = serializers.DecimalField(max_digits=12, decimal_places=2, coerce_to_string=False, read_only=True)
     
     class Meta:
         model = PurchaseOrder
         fields = ['po_id', 'store', 'store_name', 'supplier', 'supplier_name', 
-                  'order_date', 'expected_date', 'status', 'line_items', 'total_amount']
-        read_only_fields = ['po_id', 'order_date']
+                  'order_date', 'expected_date', 'status', 'line_items', 'total_amount',
+                  'item_count']
+        read_only_fields = ['po_id', 'order_date', 'total_amount', 'item_count']
+
+
+class PurchaseOrderSummarySerializer(PurchaseOrderSerializer):
+    """Purchase order without its line items, for list views"""
+    line_items = None
     
-    def get_total_amount(self, obj):
-        return sum(item.get_total_cost() for item in obj.line_items.all())
+    class Meta(PurchaseOrderSerializer.Meta):
+        fields = [name for name in PurchaseOrderSerializer.Meta.fields if name != 'line_items']
 
 
 class OrderItemSerializer(serializers.ModelSerializer):
@@ -143,16 +150,13 @@ class CustomerOrderSerializer(serializers.ModelSerializer):
     items = OrderItemSerializer(many=True, read_only=True)
     customer_name = serializers.CharField(source='customer.full_name', read_only=True)
     store_name = serializers.CharField(source='store.name', read_only=True)
-    total_amount = serializers.SerializerMethodField()
+    total_amount = serializers.DecimalField(max_digits=12, decimal_places=2, coerce_to_string=False, read_only=True)
     
     class Meta:
         model = CustomerOrder
         fields = ['order_id', 'customer', 'customer_name', 'store', 'store_name', 
-                  'order_date', 'status', 'items', 'total_amount']
-        read_only_fields = ['order_id', 'order_date']
-    
-    def get_total_amount(self, obj):
-        return obj.get_total_amount()
+                  'order_date', 'status', 'items', 'total_amount', 'item_count']
+        read_only_fields = ['order_id', 'order_date', 'total_amount', 'item_count']
 
 
 class PaymentSerializer(serializers.ModelSerializer):
@@ -193,6 +197,42 @@ class CartItemSerializer(serializers.Serializer):
     quantity = serializers.IntegerField(min_value=1)
 
 
+class CartOperationSerializer(serializers.Serializer):
+    op = serializers.ChoiceField(choices=['add', 'set', 'remove'])
+    part_id = serializers.CharField()
+    quantity = serializers.IntegerField(required=False, default=1, min_value=0)
+
+
+class CartBatchSerializer(serializers.Serializer):
+    MAX_OPERATIONS = 100
+    
+    operations = CartOperationSerializer(many=True, allow_empty=False)
+    
+    def validate_operations(self, value):
+        if len(value) > self.MAX_OPERATIONS:
+            raise serializers.ValidationError(f'At most {self.MAX_OPERATIONS} operations per request.')
+        return value
+
+
+class BulkOrderStatusSerializer(serializers.Serializer):
+    MAX_ORDERS = 1000
+    
+    order_ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+    status = serializers.ChoiceField(choices=CustomerOrder.STATUS_CHOICES, required=False)
+    delivery_status = serializers.ChoiceField(choices=Delivery.STATUS_CHOICES, required=False)
+    employee_id = serializers.IntegerField(required=False)
+    
+    def validate_order_ids(self, value):
+        if len(value) > self.MAX_ORDERS:
+            raise serializers.ValidationError(f'At most {self.MAX_ORDERS} orders per request.')
+        return list(dict.fromkeys(value))
+    
+    def validate(self, data):
+        if not any(key in data for key in ('status', 'delivery_status', 'employee_id')):
+            raise serializers.ValidationError('Nothing to change: give status, delivery_status or employee_id.')
+        return data
+
+
 class CreateOrderSerializer(serializers.Serializer):
     customer_id = serializers.IntegerField()
     store_id = serializers.IntegerField()
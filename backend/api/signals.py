@@ -0,0 +1,81 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import categories, facets, search, totals
+from .inventory import refresh_reorder_flags
+from .models import AutoPart, Category, Inventory, OrderItem, POLineItem
+from .pricing import price_cache
+from .suggest import part_index
+
+
+@receiver(post_save, sender=AutoPart)
+def update_part_search_index(sender, instance, raw=False, **kwargs):
+    """Keep the part search index in sync with the saved part"""
+    if raw:
+        return
+    search.index_part(instance)
+
+
+@receiver(post_save, sender=AutoPart)
+def update_part_suggestions(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    part_id, sku, name = instance.pk, instance.sku, instance.name
+    transaction.on_commit(lambda: part_index.update_part(part_id, sku, name))
+
+
+@receiver(post_delete, sender=AutoPart)
+def remove_part_suggestions(sender, instance, **kwargs):
+    part_id = instance.pk
+    transaction.on_commit(lambda: part_index.remove_part(part_id))
+
+
+@receiver(post_save, sender=AutoPart)
+@receiver(post_delete, sender=AutoPart)
+def invalidate_part_price(sender, instance, **kwargs):
+    part_id = instance.pk
+    price_cache.invalidate(part_id)
+    # Again after commit, in case a concurrent request re-cached the old price
+    transaction.on_commit(lambda: price_cache.invalidate(part_id))
+
+
+@receiver(post_save, sender=AutoPart)
+def update_reorder_flags(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    """reorder_level may have changed, so re-flag this part's inventory rows"""
+    if raw or created:
+        return
+    if update_fields is not None and 'reorder_level' not in update_fields:
+        return
+    refresh_reorder_flags(Inventory.objects.filter(part_id=instance.pk))
+
+
+@receiver(post_save, sender=AutoPart)
+@receiver(post_delete, sender=AutoPart)
+def bump_catalog_version(sender, raw=False, **kwargs):
+    """Invalidates cached facet counts"""
+    if raw:
+        return
+    facets.bump_catalog_version()
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_tree(sender, instance, **kwargs):
+    categories.invalidate()
+
+
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+def update_order_totals(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    totals.refresh_order_totals([instance.order_id])
+
+
+@receiver(post_save, sender=POLineItem)
+@receiver(post_delete, sender=POLineItem)
+def update_po_totals(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    totals.refresh_po_totals([instance.purchase_order_id])
@@ -0,0 +1,319 @@
+"""
+In-process prefix index for SKU / part name typeahead.
+
+SKUs are kept as a sorted list of compact keys ('AP-100245' -> 'ap100245')
+with a parallel array of part ids, so a SKU lookup is a bisect plus a short
+walk. A name query matches parts whose name contains its words as a run,
+the last one as a prefix ('pad se' matches 'Brake Pad Set'). Single words
+are looked up in a sorted vocabulary of name words; longer queries in a
+sorted vocabulary of adjacent word pairs ('brake pad', 'pad set'). Each key
+maps to a sorted array of part ids. The arrays of a query's pairs are
+intersected and the survivors checked against the part's stored word
+list, so only a handful of names are ever compared.
+Suggestions never touch the database once the index is loaded.
+
+Writers update entries in place under a lock, but replace (rather than
+edit) a key's id array, so a reader only holds the lock to pick up the
+arrays it needs and walks them without it.
+
+Each worker process holds its own copy. It is built in the background when
+the WSGI/ASGI application starts and kept current by the AutoPart signals
+in the process that made the change. Writes bump a version in the cache;
+a process that sees a version it did not make, or whose index is older
+than SUGGEST_INDEX_MAX_AGE, rebuilds in the background and keeps serving
+the old index meanwhile. With the default per-process LocMemCache the
+version is not shared, so only the age limit reaches other workers.
+"""
+import logging
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from itertools import chain
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connection
+
+from .models import AutoPart
+from .search import tokenize
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 25
+VERSION_CACHE_KEY = 'suggest:version'
+# Sorts after any character tokenize() can produce
+PREFIX_END = '\uffff'
+
+
+def normalize_sku(text):
+    return ''.join(tokenize(text))
+
+
+def _name_words(name):
+    # Interned so the vocabulary is stored once, not once per part
+    return tuple(map(sys.intern, tokenize(name)))
+
+
+def _matches(words, terms):
+    """True if `terms` appear as a run in `words`, the last term as a prefix"""
+    last = len(terms) - 1
+    for start in range(len(words) - last):
+        if (
+            words[start + last].startswith(terms[last])
+            and all(words[start + i] == terms[i] for i in range(last))
+        ):
+            return True
+    return False
+
+
+def _name_keys(words):
+    """(words, adjacent word pairs) of a tokenized name"""
+    pairs = {sys.intern(f'{a} {b}') for a, b in zip(words, words[1:])}
+    return set(words), pairs
+
+
+class _KeyIndex:
+    """Sorted keys, each with a sorted array of part ids; caller holds the lock for writes"""
+
+    def __init__(self, postings=None):
+        self.postings = postings or {}
+        self.keys = sorted(self.postings)
+
+    def add(self, key, part_id):
+        ids = self.postings.get(key)
+        if ids is None:
+            ids = array('q')
+            insort(self.keys, key)
+        # A new array rather than an edit, for readers outside the lock
+        ids = array('q', ids)
+        i = bisect_left(ids, part_id)
+        if i == len(ids) or ids[i] != part_id:
+            ids.insert(i, part_id)
+        self.postings[key] = ids
+
+    def discard(self, key, part_id):
+        ids = array('q', self.postings.get(key, ()))
+        i = bisect_left(ids, part_id)
+        if i < len(ids) and ids[i] == part_id:
+            del ids[i]
+        if ids:
+            self.postings[key] = ids
+        elif key in self.postings:
+            del self.postings[key]
+            del self.keys[bisect_left(self.keys, key)]
+
+    def exact(self, key):
+        """Id array of `key`, or None"""
+        return self.postings.get(key)
+
+    def prefixed(self, prefix):
+        """Id arrays of every key starting with `prefix`"""
+        lo = bisect_left(self.keys, prefix)
+        hi = bisect_left(self.keys, prefix + PREFIX_END)
+        return [self.postings[key] for key in self.keys[lo:hi]]
+
+
+def _current_version():
+    return cache.get_or_set(VERSION_CACHE_KEY, 1, None)
+
+
+def _bump_version():
+    try:
+        return cache.incr(VERSION_CACHE_KEY)
+    except ValueError:
+        cache.set(VERSION_CACHE_KEY, 1, None)
+        return 1
+
+
+class PrefixIndex:
+    def __init__(self):
+        self._lock = threading.Lock()        # guards the structures below
+        self._build_lock = threading.Lock()  # one rebuild at a time
+        self._loaded = False
+        self._version = None
+        self._loaded_at = 0.0
+        self._checked_at = 0.0
+        self._parts = {}             # part_id -> (sku, name, name words)
+        self._skus = []              # sorted compact SKUs
+        self._sku_ids = array('q')   # part id of each entry in _skus
+        self._words = _KeyIndex()    # name word -> part ids
+        self._pairs = _KeyIndex()    # 'word next-word' -> part ids
+
+    def load(self):
+        """(Re)build the index from the database"""
+        with self._build_lock:
+            self._build()
+
+    def load_in_background(self):
+        """Rebuild on a daemon thread unless a rebuild is already running"""
+        if not self._build_lock.locked():
+            threading.Thread(target=self._background_load, name='suggest-index', daemon=True).start()
+
+    def _background_load(self):
+        if not self._build_lock.acquire(blocking=False):
+            return
+        try:
+            self._build()
+        except DatabaseError:
+            # e.g. started before migrate; the next request retries
+            logger.exception('Could not build the part suggestion index')
+        finally:
+            self._build_lock.release()
+            connection.close()
+
+    def _build(self):
+        # Caller holds _build_lock. Read the version first: a write that
+        # lands during the build bumps it again and triggers another rebuild
+        version = _current_version()
+        parts = {}
+        sku_entries = []
+        word_postings = {}
+        pair_postings = {}
+        for part_id, sku, name in AutoPart.objects.values_list('part_id', 'sku', 'name').order_by('part_id').iterator():
+            words = _name_words(name)
+            parts[part_id] = (sku, name, words)
+            sku_entries.append((normalize_sku(sku), part_id))
+            word_keys, pair_keys = _name_keys(words)
+            # Rows arrive in part_id order, so each array is already sorted
+            for key in word_keys:
+                word_postings.setdefault(key, array('q')).append(part_id)
+            for key in pair_keys:
+                pair_postings.setdefault(key, array('q')).append(part_id)
+        sku_entries.sort()
+        skus = [key for key, _ in sku_entries]
+        sku_ids = array('q', (part_id for _, part_id in sku_entries))
+        words, pairs = _KeyIndex(word_postings), _KeyIndex(pair_postings)
+        with self._lock:
+            self._parts, self._skus, self._sku_ids = parts, skus, sku_ids
+            self._words, self._pairs = words, pairs
+            self._version = version
+            self._loaded_at = self._checked_at = time.monotonic()
+            self._loaded = True
+
+    def _ensure_fresh(self):
+        if not self._loaded:
+            with self._build_lock:
+                if not self._loaded:
+                    self._build()
+            return
+
+        now = time.monotonic()
+        if now - self._checked_at < settings.SUGGEST_VERSION_CHECK_INTERVAL:
+            return
+        self._checked_at = now
+        if now - self._loaded_at > settings.SUGGEST_INDEX_MAX_AGE or _current_version() != self._version:
+            self.load_in_background()
+
+    def update_part(self, part_id, sku, name):
+        words = _name_words(name)
+        word_keys, pair_keys = _name_keys(words)
+        with self._lock:
+            if self._loaded:
+                self._remove(part_id)
+                self._parts[part_id] = (sku, name, words)
+                key = normalize_sku(sku)
+                i = bisect_right(self._skus, key)
+                self._skus.insert(i, key)
+                self._sku_ids.insert(i, part_id)
+                for key in word_keys:
+                    self._words.add(key, part_id)
+                for key in pair_keys:
+                    self._pairs.add(key, part_id)
+        self._record_write()
+
+    def remove_part(self, part_id):
+        with self._lock:
+            if self._loaded:
+                self._remove(part_id)
+        self._record_write()
+
+    def _record_write(self):
+        # Other processes rebuild when they see the new version; this one
+        # is already current unless it had missed an earlier write
+        version = _bump_version()
+        with self._lock:
+            if self._version == version - 1:
+                self._version = version
+
+    def _remove(self, part_id):
+        # Caller holds the lock
+        entry = self._parts.pop(part_id, None)
+        if entry is None:
+            return
+        sku, _, words = entry
+        key = normalize_sku(sku)
+        for i in range(bisect_left(self._skus, key), bisect_right(self._skus, key)):
+            if self._sku_ids[i] == part_id:
+                del self._skus[i]
+                del self._sku_ids[i]
+                break
+        word_keys, pair_keys = _name_keys(words)
+        for key in word_keys:
+            self._words.discard(key, part_id)
+        for key in pair_keys:
+            self._pairs.discard(key, part_id)
+
+    def suggest(self, prefix, limit=DEFAULT_LIMIT):
+        """Top `limit` parts whose SKU or name starts with `prefix`, SKU hits first"""
+        self._ensure_fresh()
+        sku_needle = normalize_sku(prefix)
+        terms = tokenize(prefix)
+
+        results = []
+        seen = set()
+        with self._lock:
+            if sku_needle:
+                i = bisect_left(self._skus, sku_needle)
+                while i < len(self._skus) and len(results) < limit and self._skus[i].startswith(sku_needle):
+                    seen.add(self._sku_ids[i])
+                    results.append(self._result(self._sku_ids[i]))
+                    i += 1
+            if not terms or len(results) >= limit:
+                return results
+
+            # Only references are taken here; id arrays are never edited in
+            # place, so they can be walked after the lock is released
+            if len(terms) == 1:
+                exact, last = [], self._words.prefixed(terms[0])
+            else:
+                exact = [self._pairs.exact(f'{a} {b}') for a, b in zip(terms, terms[1:-1])]
+                last = self._pairs.prefixed(f'{terms[-2]} {terms[-1]}')
+            parts = self._parts
+
+        if not last or not all(exact):
+            return results
+
+        if exact:
+            # Three or more terms: intersect the pairs' ids (set operations
+            # run in C), then check the few survivors for one unbroken run
+            candidates = set(min(exact, key=len))
+            for ids in exact:
+                candidates.intersection_update(ids)
+            candidates.intersection_update(chain.from_iterable(last))
+            sources = [sorted(candidates)]
+        else:
+            # One or two terms: every id under the last key is a match
+            sources = last
+
+        for ids in sources:
+            for part_id in ids:
+                if part_id in seen:
+                    continue
+                seen.add(part_id)
+                entry = parts.get(part_id)
+                if entry is None or (exact and not _matches(entry[2], terms)):
+                    continue
+                results.append({'part_id': part_id, 'sku': entry[0], 'name': entry[1]})
+                if len(results) >= limit:
+                    return results
+        return results
+
+    def _result(self, part_id):
+        sku, name, _ = self._parts[part_id]
+        return {'part_id': part_id, 'sku': sku, 'name': name}
+
+
+part_index = PrefixIndex()
@@ -0,0 +1,9 @@
+import pytest
+from django.core.cache import cache
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """The local-memory cache outlives the rows of the previous test"""
+    cache.clear()
+    yield
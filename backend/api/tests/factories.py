@@ -0,0 +1,37 @@
+"""Small model builders shared by the API tests"""
+from decimal import Decimal
+
+from api.models import AutoPart, Customer, Inventory, Store
+
+PASSWORD = 'secret-pass'
+
+
+def make_store(name='Main Street'):
+    return Store.objects.create(
+        name=name, phone='555-0100', address_line1='1 Main St',
+        city='Springfield', state='IL', postal_code='62701',
+    )
+
+
+def make_part(n, **fields):
+    defaults = {
+        'sku': f'AP-{100000 + n}',
+        'name': f'Brake Pad Set {n}',
+        'category': 'Brake Pads',
+        'condition': 'NEW',
+        'unit_price': Decimal('10.00') + n,
+        'reorder_level': 5,
+    }
+    defaults.update(fields)
+    return AutoPart.objects.create(**defaults)
+
+
+def make_customer(username='driver'):
+    return Customer.objects.create(
+        full_name='Pat Driver', customer_email=f'{username}@example.com',
+        customer_phone='555-0101', username=username, password=PASSWORD,
+    )
+
+
+def stock(store, part, quantity):
+    return Inventory.objects.create(store=store, part=part, quantity_on_hand=quantity)
@@ -0,0 +1,18 @@
+from django.db import transaction
+from django.test import TestCase
+
+from api.models import Category
+
+from .factories import make_part
+
+
+class CategoryResolveTests(TestCase):
+    def test_rolled_back_category_is_created_again(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                make_part(1, category='Turbo Chargers')
+                raise RuntimeError('roll back')
+        self.assertFalse(Category.objects.filter(slug='turbo-chargers').exists())
+
+        part = make_part(2, category='Turbo Chargers')
+        self.assertEqual(part.category_ref.name, 'Turbo Chargers')
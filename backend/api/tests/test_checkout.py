@@ -0,0 +1,57 @@
+from django.test import TestCase
+
+from api.models import CustomerOrder, Inventory
+
+from .factories import PASSWORD, make_customer, make_part, make_store, stock
+
+
+class CartCheckoutQueryCountTests(TestCase):
+    """Checkout cost must not grow with the number of cart lines"""
+
+    # Session load, store lookup, stock reservation, order/items/payment/
+    # delivery inserts, session save, plus the savepoints around them
+    CHECKOUT_QUERIES = 14
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.store = make_store()
+        cls.customer = make_customer()
+        cls.parts = [make_part(n) for n in range(30)]
+        for part in cls.parts:
+            stock(cls.store, part, 100)
+
+    def setUp(self):
+        response = self.client.post(
+            '/api/auth/customer/login/',
+            {'username': self.customer.username, 'password': PASSWORD},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def fill_cart(self, lines):
+        response = self.client.post(
+            '/api/cart/batch/',
+            {'operations': [{'op': 'add', 'part_id': part.part_id, 'quantity': 2} for part in self.parts[:lines]]},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def checkout(self):
+        return self.client.post(
+            '/api/cart/checkout/',
+            {'payment_method': 'CREDIT_CARD', 'card_last_four_digit': '4242'},
+            content_type='application/json',
+        )
+
+    def test_query_count_is_independent_of_line_count(self):
+        for lines in (3, 30):
+            self.fill_cart(lines)
+            with self.assertNumQueries(self.CHECKOUT_QUERIES):
+                response = self.checkout()
+            self.assertEqual(response.status_code, 201, response.content)
+
+        self.assertEqual(
+            sorted(CustomerOrder.objects.values_list('item_count', flat=True)), [3, 30]
+        )
+        self.assertEqual(Inventory.objects.get(part=self.parts[0]).quantity_on_hand, 96)
+        self.assertEqual(Inventory.objects.get(part=self.parts[29]).quantity_on_hand, 98)
@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.test import AsyncClient, TestCase, override_settings
+
+
+class OrderEventsTests(TestCase):
+    def test_refused_outside_asgi(self):
+        response = self.client.get('/api/events/orders/', {'store_id': 1})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], str(settings.ORDER_EVENTS_MAX_AGE))
+
+    @override_settings(ORDER_EVENTS_MAX_AGE=0)
+    async def test_streams_under_asgi(self):
+        response = await AsyncClient().get('/api/events/orders/', {'store_id': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = [chunk async for chunk in response.streaming_content]
+        self.assertEqual(chunks, [b'retry: 3000\n\n'])
@@ -0,0 +1,89 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from api.idempotency import purge_expired
+from api.models import CustomerOrder, IdempotencyKey
+
+from .factories import make_customer, make_part, make_store, stock
+
+
+class CreateOrderIdempotencyTests(TestCase):
+    """Retries of create_order are answered from the shared key table"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.store = make_store()
+        cls.first = make_customer('first')
+        cls.second = make_customer('second')
+        cls.part = make_part(1)
+        stock(cls.store, cls.part, 100)
+
+    def create_order(self, customer, key='retry-1', quantity=1):
+        return self.client.post(
+            '/api/customer-orders/create_order/',
+            {
+                'customer_id': customer.customer_id,
+                'store_id': self.store.store_id,
+                'items': [{'part_id': self.part.part_id, 'quantity': quantity}],
+                'payment_method': 'CREDIT_CARD',
+                'card_last_four_digit': '4242',
+            },
+            content_type='application/json',
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_retry_replays_the_first_response(self):
+        first = self.create_order(self.first)
+        retry = self.create_order(self.first)
+
+        self.assertEqual(first.status_code, 201, first.content)
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(CustomerOrder.objects.count(), 1)
+
+    def test_keys_are_scoped_by_body_customer(self):
+        # Neither request has a customer session
+        first = self.create_order(self.first)
+        second = self.create_order(self.second)
+
+        self.assertEqual(second.status_code, 201, second.content)
+        self.assertNotEqual(second.json()['order_id'], first.json()['order_id'])
+        self.assertEqual(CustomerOrder.objects.count(), 2)
+
+    def test_reused_key_with_a_different_body_is_rejected(self):
+        self.create_order(self.first)
+        response = self.create_order(self.first, quantity=2)
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(CustomerOrder.objects.count(), 1)
+
+    def test_key_held_by_a_running_request_conflicts(self):
+        self.create_order(self.first)
+        # As if the first request were still running on another worker
+        IdempotencyKey.objects.update(state='IN_FLIGHT')
+        response = self.create_order(self.first)
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(CustomerOrder.objects.count(), 1)
+
+    def test_expired_key_is_taken_over_and_purged(self):
+        self.create_order(self.first)
+        IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        response = self.create_order(self.first)
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(CustomerOrder.objects.count(), 2)
+
+        IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(purge_expired(), 1)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_failed_request_releases_its_key(self):
+        response = self.create_order(self.first, quantity=1000)
+
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(IdempotencyKey.objects.exists())
@@ -0,0 +1,55 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TransactionTestCase
+
+from api.inventory import InsufficientStock
+from api.models import CustomerOrder, Inventory, OrderItem
+from api.orders import place_order
+
+from .factories import make_customer, make_part, make_store, stock
+
+
+class ConcurrentCheckoutTests(TransactionTestCase):
+    """Parallel checkouts of one SKU must never oversell it"""
+
+    STOCK = 50
+    CHECKOUTS = 300
+    WORKERS = 16
+
+    def setUp(self):
+        self.store = make_store()
+        self.customer = make_customer()
+        self.part = make_part(1)
+        stock(self.store, self.part, self.STOCK)
+
+    def checkout(self, _):
+        try:
+            place_order(self.customer.pk, self.store, [(self.part.pk, 1, Decimal('11.00'))], 'PAYPAL')
+            return True
+        except InsufficientStock:
+            return False
+        finally:
+            # Each worker thread has its own connection
+            connection.close()
+
+    def test_exactly_the_stock_is_sold(self):
+        start = threading.Barrier(self.WORKERS)
+
+        def run(i):
+            if i < self.WORKERS:
+                start.wait()
+            return self.checkout(i)
+
+        with ThreadPoolExecutor(self.WORKERS) as pool:
+            results = list(pool.map(run, range(self.CHECKOUTS)))
+
+        self.assertEqual(results.count(True), self.STOCK)
+        self.assertEqual(results.count(False), self.CHECKOUTS - self.STOCK)
+        inventory = Inventory.objects.get(store=self.store, part=self.part)
+        self.assertEqual(inventory.quantity_on_hand, 0)
+        self.assertTrue(inventory.needs_reorder)
+        self.assertEqual(CustomerOrder.objects.count(), self.STOCK)
+        self.assertEqual(OrderItem.objects.count(), self.STOCK)
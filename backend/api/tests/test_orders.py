@@ -0,0 +1,124 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.throttling import SimpleRateThrottle
+
+from api.models import CustomerOrder
+from api.orders import bulk_update_status, place_order
+
+from .factories import make_customer, make_part, make_store, stock
+
+
+@override_settings(ORDER_HISTORY_PAGE_SIZE=10)
+class OrderHistoryTests(TestCase):
+    ORDERS = 45
+    ITEMS_PER_ORDER = 8
+
+    @classmethod
+    def setUpTestData(cls):
+        store = make_store()
+        cls.customer = make_customer()
+        other = make_customer('other')
+        parts = [make_part(n) for n in range(cls.ITEMS_PER_ORDER)]
+        for part in parts:
+            stock(store, part, 10000)
+
+        lines = [(part.pk, 1, part.unit_price) for part in parts]
+        for _ in range(cls.ORDERS):
+            place_order(cls.customer.pk, store, lines, 'CREDIT_CARD', '4242')
+        place_order(other.pk, store, lines, 'CREDIT_CARD', '4242')
+
+        # Orders placed in the same instant tie on order_date, and a page
+        # boundary falls inside the tie
+        orders = CustomerOrder.objects.filter(customer=cls.customer)
+        same_instant = timezone.now() - timedelta(days=1)
+        orders.filter(pk__in=list(orders.order_by('pk').values_list('pk', flat=True)[5:25])).update(
+            order_date=same_instant
+        )
+
+    def fetch(self, cursor=None):
+        url = f'/api/customers/{self.customer.pk}/order_history/'
+        # Customer, orders, and all their items with parts
+        with self.assertNumQueries(3):
+            response = self.client.get(url, {'cursor': cursor} if cursor else {})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_pages_cost_three_queries_and_cover_every_order_once(self):
+        seen = []
+        page = self.fetch()
+        while True:
+            for order in page['results']:
+                self.assertEqual(len(order['items']), self.ITEMS_PER_ORDER)
+            seen.extend(order['order_id'] for order in page['results'])
+            if not page['next_cursor']:
+                break
+            page = self.fetch(page['next_cursor'])
+
+        expected = list(
+            CustomerOrder.objects.filter(customer=self.customer)
+            .order_by('-order_date', '-order_id')
+            .values_list('order_id', flat=True)
+        )
+        self.assertEqual(len(expected), self.ORDERS)
+        self.assertEqual(seen, expected)
+
+    def test_total_amount_is_a_number(self):
+        order = self.fetch()['results'][0]
+        expected = sum(float(item['unit_price']) * item['quantity'] for item in order['items'])
+        self.assertIsInstance(order['total_amount'], float)
+        self.assertAlmostEqual(order['total_amount'], expected)
+
+    def test_bad_cursor_starts_from_the_first_page(self):
+        first = self.fetch()
+        self.assertEqual(self.fetch('WyJ4IiwiYWJjIl0')['results'], first['results'])
+
+
+class OrderChangeFeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.store = make_store()
+        part = make_part(1)
+        stock(cls.store, part, 100)
+        cls.order, _ = place_order(make_customer().pk, cls.store, [(part.pk, 1, part.unit_price)], 'CREDIT_CARD', '4242')
+        # Placed well before the dashboard loaded its list
+        CustomerOrder.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+
+    def poll(self, since):
+        response = self.client.get('/api/customer-orders/by_store/', {'store_id': self.store.pk, 'since': since})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_delivery_only_change_reaches_the_feed(self):
+        cursor = self.poll('')['cursor']
+        self.assertEqual(self.poll(cursor)['results'], [])
+
+        result = bulk_update_status([self.order.pk], delivery_status='IN_TRANSIT')
+
+        self.assertEqual(result, {self.order.pk: 'updated'})
+        changed = self.poll(cursor)['results']
+        self.assertEqual([order['order_id'] for order in changed], [self.order.pk])
+
+
+class OrderFeedThrottleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.store = make_store()
+
+    def test_an_hour_of_dashboard_polling_is_not_throttled(self):
+        url = '/api/customer-orders/by_store/'
+        params = {'store_id': self.store.pk, 'status': 'PROCESSING', 'since': ''}
+        clock = [1_000_000.0]
+
+        # One poll every 10 s, as the dashboard does, for an hour and a bit
+        with mock.patch.object(SimpleRateThrottle, 'timer', lambda throttle: clock[0]):
+            for _ in range(400):
+                response = self.client.get(url, params)
+                self.assertEqual(response.status_code, 200)
+                params['since'] = response.json()['cursor']
+                clock[0] += 10
+
+            # The feed has its own bucket, so the anonymous one is untouched
+            self.assertEqual(self.client.get('/api/cart/summary/').status_code, 200)
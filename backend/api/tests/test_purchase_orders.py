@@ -0,0 +1,61 @@
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+
+from api.models import Inventory, POLineItem, PurchaseOrder, Supplier
+
+from .factories import make_part, make_store, stock
+
+
+class ReceivePurchaseOrderTests(TestCase):
+    """receive_order adds each line to stock exactly once"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.store = make_store()
+        supplier = Supplier.objects.create(
+            name='Acme Parts', contact_email='orders@acme.example', phone='555-0102', address='2 Depot Rd',
+        )
+        # reorder_level is 5 for every part
+        cls.stocked = make_part(1)
+        cls.new_low = make_part(2)
+        cls.new_ample = make_part(3)
+        stock(cls.store, cls.stocked, 2)
+
+        cls.po = PurchaseOrder.objects.create(store=cls.store, supplier=supplier, expected_date=date.today())
+        for part, quantity in ((cls.stocked, 10), (cls.new_low, 3), (cls.new_ample, 20)):
+            POLineItem.objects.create(purchase_order=cls.po, part=part, quantity=quantity, unit_cost=Decimal('4.00'))
+
+    def receive(self):
+        return self.client.post(f'/api/purchase-orders/{self.po.pk}/receive_order/')
+
+    def stock_levels(self):
+        return {
+            part_id: (quantity, needs_reorder)
+            for part_id, quantity, needs_reorder in Inventory.objects.filter(store=self.store)
+            .values_list('part_id', 'quantity_on_hand', 'needs_reorder')
+        }
+
+    def test_lines_are_added_to_existing_and_new_inventory_rows(self):
+        self.assertEqual(self.stock_levels(), {self.stocked.pk: (2, True)})
+
+        response = self.receive()
+
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['status'], 'RECEIVED')
+        self.assertEqual(PurchaseOrder.objects.get(pk=self.po.pk).status, 'RECEIVED')
+        self.assertEqual(self.stock_levels(), {
+            self.stocked.pk: (12, False),
+            self.new_low.pk: (3, True),
+            self.new_ample.pk: (20, False),
+        })
+
+    def test_second_receipt_is_rejected_without_adding_stock(self):
+        self.receive()
+        received = self.stock_levels()
+
+        response = self.receive()
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.stock_levels(), received)
@@ -0,0 +1,62 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from api import suggest
+from api.suggest import PrefixIndex
+
+from .factories import make_part
+
+
+class PrefixIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.pads = make_part(1, sku='BP-100', name='Front Brake Pad Set')
+        cls.rotor = make_part(2, sku='BR-200', name='Rear Brake Rotor')
+        cls.kit = make_part(3, sku='KT-300', name='Pad Kit Brake Set')
+
+    def setUp(self):
+        self.index = PrefixIndex()
+        self.index.load()
+
+    def names(self, prefix):
+        return [hit['name'] for hit in self.index.suggest(prefix)]
+
+    def test_name_words_match_as_a_run_with_the_last_one_as_a_prefix(self):
+        self.assertEqual(self.names('pad se'), ['Front Brake Pad Set'])
+        self.assertEqual(self.names('front brake pad s'), ['Front Brake Pad Set'])
+        self.assertEqual(self.names('brake set'), ['Pad Kit Brake Set'])
+        self.assertEqual(self.names('pad brake'), [])
+        self.assertEqual(sorted(self.names('brak')), ['Front Brake Pad Set', 'Pad Kit Brake Set', 'Rear Brake Rotor'])
+
+    def test_sku_hits_come_first(self):
+        make_part(4, sku='PAD-1', name='Caliper Bracket')
+        self.index.load()
+        self.assertEqual(self.names('pad')[0], 'Caliper Bracket')
+
+    def test_updates_and_removals_are_applied_in_place(self):
+        self.index.update_part(self.rotor.pk, 'BR-200', 'Rear Disc Rotor')
+        self.assertEqual(self.names('rear brake'), [])
+        self.assertEqual(self.names('rear disc r'), ['Rear Disc Rotor'])
+
+        self.index.remove_part(self.pads.pk)
+        self.assertEqual(self.names('pad se'), [])
+        self.assertEqual(self.names('bp-1'), [])
+
+    @override_settings(SUGGEST_VERSION_CHECK_INTERVAL=0)
+    def test_write_from_another_process_triggers_a_rebuild(self):
+        with mock.patch.object(self.index, 'load_in_background') as rebuild:
+            self.index.suggest('brake')
+            rebuild.assert_not_called()
+
+            # Another worker saved a part and bumped the shared version
+            suggest._bump_version()
+            self.index.suggest('brake')
+            rebuild.assert_called_once()
+
+    @override_settings(SUGGEST_VERSION_CHECK_INTERVAL=0)
+    def test_own_writes_do_not_trigger_a_rebuild(self):
+        with mock.patch.object(self.index, 'load_in_background') as rebuild:
+            self.index.update_part(self.kit.pk, 'KT-300', 'Pad Kit')
+            self.index.suggest('brake')
+            rebuild.assert_not_called()
@@ -0,0 +1,83 @@
+"""
+Stored order totals.
+
+CustomerOrder and PurchaseOrder keep `total_amount` and `item_count` (number
+of lines) as columns so listings and reports read them directly instead of
+summing child rows. place_order writes them with the order; every other item
+write goes through the OrderItem/POLineItem signals, which recompute the
+parent inside the same transaction. Writes that skip signals (queryset
+update(), raw SQL, fixtures) can be repaired with `manage.py sync_order_totals`.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import CustomerOrder, OrderItem, POLineItem, PurchaseOrder
+
+AMOUNT = DecimalField(max_digits=12, decimal_places=2)
+
+
+def _child_aggregates(child_model, parent_field, price_field):
+    """(total, count) subqueries over the children of the outer parent row"""
+    children = child_model.objects.filter(**{parent_field: OuterRef('pk')}).values(parent_field)
+    total = children.annotate(value=Sum(F('quantity') * F(price_field), output_field=AMOUNT)).values('value')
+    count = children.annotate(value=Count('pk')).values('value')
+    return (
+        Coalesce(Subquery(total), Value(Decimal('0.00')), output_field=AMOUNT),
+        Coalesce(Subquery(count), Value(0)),
+    )
+
+
+def _order_aggregates():
+    return _child_aggregates(OrderItem, 'order', 'unit_price')
+
+
+def _po_aggregates():
+    return _child_aggregates(POLineItem, 'purchase_order', 'unit_cost')
+
+
+def _refresh(queryset, aggregates, **extra):
+    total, count = aggregates
+    with transaction.atomic():
+        # Lock the parents first so the UPDATE below starts after any
+        # concurrent item write to the same order has committed
+        list(queryset.select_for_update().values_list('pk', flat=True))
+        return queryset.update(total_amount=total, item_count=count, **extra)
+
+
+def refresh_order_totals(order_ids=None):
+    """Recompute stored totals for the given customer orders (all if None)"""
+    orders = CustomerOrder.objects.all()
+    if order_ids is not None:
+        orders = orders.filter(pk__in=order_ids)
+    return _refresh(orders, _order_aggregates(), updated_at=timezone.now())
+
+
+def refresh_po_totals(po_ids=None):
+    """Recompute stored totals for the given purchase orders (all if None)"""
+    pos = PurchaseOrder.objects.all()
+    if po_ids is not None:
+        pos = pos.filter(pk__in=po_ids)
+    return _refresh(pos, _po_aggregates())
+
+
+def _drift(queryset, aggregates):
+    total, count = aggregates
+    return (
+        queryset.annotate(actual_total=total, actual_count=count)
+        .filter(~Q(total_amount=F('actual_total')) | ~Q(item_count=F('actual_count')))
+        .values('pk', 'total_amount', 'actual_total', 'item_count', 'actual_count')
+    )
+
+
+def order_drift():
+    """Customer orders whose stored totals do not match their items"""
+    return _drift(CustomerOrder.objects.all(), _order_aggregates())
+
+
+def po_drift():
+    """Purchase orders whose stored totals do not match their line items"""
+    return _drift(PurchaseOrder.objects.all(), _po_aggregates())
@@ -33,5 +33,9 @@ urlpatterns = [
     path('cart/summary/', views.cart_summary, name='cart-summary-api'),
     path('cart/clear/', views.cart_clear, name='cart-clear-api'),
     path('cart/remove/', views.cart_remove, name='cart-remove-api'),
+    path('cart/batch/', views.cart_batch, name='cart-batch-api'),
     path('cart/checkout/', views.cart_checkout, name='cart-checkout-api'),
+
+    # Server-Sent Events for the employee dashboard
+    path('events/orders/', views.order_events, name='order-events'),
 ]
\ No newline at end of file
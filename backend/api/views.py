@@ -1,19 +1,25 @@
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, redirect
 from rest_framework import viewsets, status
 from rest_framework.decorators import action, api_view
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from django.db.models import Q, Sum, Count, F
+from rest_framework.throttling import AnonRateThrottle
+from django.db.models import Q, Sum, Count, F, Prefetch, DecimalField
 from django.db import transaction
 from django.utils import timezone
 from datetime import datetime, timedelta
-from decimal import Decimal
-import uuid
+import asyncio
+import io
+import time
 
 from .models import (
     Store, Customer, Employee, Supplier, AutoPart, Inventory,
     PurchaseOrder, POLineItem, CustomerOrder, OrderItem,
-    Payment, Delivery, ReturnItem
+    Delivery, ReturnItem
 )
 from .serializers import (
     StoreSerializer, CustomerSerializer, CustomerLoginSerializer,
@@ -21,8 +27,21 @@ from .serializers import (
     AutoPartSerializer, InventorySerializer, PurchaseOrderSerializer,
     POLineItemSerializer, CustomerOrderSerializer, OrderItemSerializer,
     PaymentSerializer, DeliverySerializer, ReturnItemSerializer,
-    CreateOrderSerializer
+    CreateOrderSerializer, CartBatchSerializer, BulkOrderStatusSerializer,
+    PurchaseOrderSummarySerializer
 )
+from . import categories, facets, replenishment, search
+from .cart import CartStore
+from .events import ORDER_UPDATED, format_event, hub, publish_order_event
+from .idempotency import idempotent
+from .inventory import InsufficientStock, receive_purchase_order
+from .po_import import import_po_lines
+from .orders import (
+    bulk_update_status, changed_orders, history_queryset, initial_change_cursor, place_order
+)
+from .pagination import keyset_page
+from .pricing import price_cart, resolve_keys
+from .suggest import part_index, DEFAULT_LIMIT, MAX_LIMIT
 
 
 # Authentication Views
@@ -119,9 +138,14 @@ class CustomerViewSet(viewsets.ModelViewSet):
     def order_history(self, request, pk=None):
         """Get customer's order history"""
         customer = self.get_object()
-        orders = CustomerOrder.objects.filter(customer=customer).order_by('-order_date')
+        orders, next_cursor = keyset_page(
+            history_queryset(customer.pk),
+            ('-order_date', '-order_id'),
+            cursor=request.query_params.get('cursor'),
+            page_size=settings.ORDER_HISTORY_PAGE_SIZE,
+        )
         serializer = CustomerOrderSerializer(orders, many=True)
-        return Response(serializer.data)
+        return Response({'results': serializer.data, 'next_cursor': next_cursor})
 
 
 # Employee ViewSet
@@ -141,6 +165,16 @@ class EmployeeViewSet(viewsets.ModelViewSet):
                        status=status.HTTP_400_BAD_REQUEST)
 
 
+class SuggestRateThrottle(AnonRateThrottle):
+    """Typeahead fires on every keystroke, so it gets its own bucket instead of the anon one"""
+    scope = 'suggest'
+
+
+class OrderFeedRateThrottle(AnonRateThrottle):
+    """Employee terminals poll the order change feed every few seconds, so it has its own bucket too"""
+    scope = 'order_feed'
+
+
 # AutoPart ViewSet
 class AutoPartViewSet(viewsets.ModelViewSet):
     queryset = AutoPart.objects.all()
@@ -156,26 +190,53 @@ class AutoPartViewSet(viewsets.ModelViewSet):
         parts = self.queryset
         
         if query:
-            parts = parts.filter(
-                Q(name__icontains=query) | 
-                Q(sku__icontains=query) |
-                Q(category__icontains=query)
-            )
+            if search.index_enabled():
+                parts = search.search_parts(query, parts)
+            else:
+                parts = search.basic_search(query, parts)
         
         if category:
-            parts = parts.filter(category__iexact=category)
+            parts = categories.filter_by_category(parts, category)
         
         if condition:
             parts = parts.filter(condition=condition)
         
         serializer = self.get_serializer(parts, many=True)
+        
+        # ?facets=1 adds category/condition/price counts for the same filters
+        if request.query_params.get('facets') in ('1', 'true'):
+            return Response({
+                'results': serializer.data,
+                'facets': facets.cached_facets(
+                    parts, view='api-search', q=query, category=category, condition=condition
+                ),
+            })
         return Response(serializer.data)
     
+    @action(
+        detail=False, methods=['get'], authentication_classes=[], permission_classes=[AllowAny],
+        throttle_classes=[SuggestRateThrottle],
+    )
+    def suggest(self, request):
+        """Typeahead suggestions for a SKU or part name prefix (served from memory)"""
+        prefix = request.query_params.get('prefix', '').strip()
+        try:
+            limit = min(int(request.query_params.get('limit', DEFAULT_LIMIT)), MAX_LIMIT)
+        except ValueError:
+            limit = DEFAULT_LIMIT
+        
+        if not prefix or limit < 1:
+            return Response({'suggestions': []})
+        return Response({'suggestions': part_index.suggest(prefix, limit)})
+    
     @action(detail=False, methods=['get'])
     def categories(self, request):
-        """Get all unique categories"""
-        categories = AutoPart.objects.values_list('category', flat=True).distinct()
-        return Response({'categories': list(categories)})
+        """Get all categories"""
+        return Response({
+            'categories': [
+                {'slug': slug, 'name': name} for slug, name in categories.all_categories()
+            ]
+        })
 
 
 # Inventory ViewSet
@@ -187,9 +248,7 @@ class InventoryViewSet(viewsets.ModelViewSet):
     def low_stock(self, request):
         """Get parts that need reordering"""
         store_id = request.query_params.get('store_id')
-        inventory = self.queryset.filter(
-            quantity_on_hand__lte=F('part__reorder_level')
-        )
+        inventory = self.queryset.filter(needs_reorder=True)
         
         if store_id:
             inventory = inventory.filter(store_id=store_id)
@@ -229,9 +288,25 @@ class InventoryViewSet(viewsets.ModelViewSet):
 
 # Purchase Order ViewSet
 class PurchaseOrderViewSet(viewsets.ModelViewSet):
-    queryset = PurchaseOrder.objects.select_related('store', 'supplier').prefetch_related('line_items').all()
+    queryset = PurchaseOrder.objects.select_related('store', 'supplier').prefetch_related(
+        Prefetch('line_items', queryset=POLineItem.objects.select_related('part'))
+    ).order_by('-po_id')
     serializer_class = PurchaseOrderSerializer
     
+    def _summary(self):
+        return self.action == 'list' and self.request.query_params.get('summary') in ('1', 'true')
+    
+    def get_queryset(self):
+        # ?summary=1 lists orders without their lines, so skip loading them
+        if self._summary():
+            return self.queryset.prefetch_related(None)
+        return self.queryset
+    
+    def get_serializer_class(self):
+        if self._summary():
+            return PurchaseOrderSummarySerializer
+        return self.serializer_class
+    
     @action(detail=True, methods=['post'])
     def add_line_item(self, request, pk=None):
         """Add line item to purchase order"""
@@ -243,53 +318,140 @@ class PurchaseOrderViewSet(viewsets.ModelViewSet):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
+    @action(detail=True, methods=['post'], parser_classes=[MultiPartParser])
+    def import_lines(self, request, pk=None):
+        """
+        Add line items from an uploaded CSV packing list (multipart field
+        "file", columns sku,quantity,unit_cost). All rows are added or, if
+        any row is invalid, none are; the response lists the bad rows.
+        """
+        po = self.get_object()
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'file is required'},
+                          status=status.HTTP_400_BAD_REQUEST)
+        
+        # Decoded lazily as the csv reader pulls rows
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', errors='replace', newline='')
+        report = import_po_lines(po.pk, stream)
+        
+        result_status = status.HTTP_400_BAD_REQUEST if report.error_count else status.HTTP_201_CREATED
+        return Response(report.as_dict(), status=result_status)
+    
+    @action(detail=False, methods=['post'])
+    def replenish(self, request):
+        """
+        Create purchase orders for all inventory at or below its reorder level.
+        Optional JSON: {"store_id": 1, "dry_run": true}
+        """
+        store_id = request.data.get('store_id')
+        if store_id is not None:
+            try:
+                store_id = int(store_id)
+            except (TypeError, ValueError):
+                return Response({'error': 'store_id must be an integer'},
+                              status=status.HTTP_400_BAD_REQUEST)
+        dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true')
+        
+        summary = replenishment.replenish(store_id=store_id, dry_run=dry_run)
+        return Response(summary, status=status.HTTP_200_OK if dry_run else status.HTTP_201_CREATED)
+    
     @action(detail=True, methods=['post'])
     def receive_order(self, request, pk=None):
         """Mark purchase order as received and update inventory"""
         po = self.get_object()
         
-        if po.status == 'RECEIVED':
+        # One conditional UPDATE plus one upsert for all lines; a second
+        # receipt of the same PO (even a concurrent one) adds nothing
+        if not receive_purchase_order(po.pk):
             return Response({'error': 'Order already received'}, 
                           status=status.HTTP_400_BAD_REQUEST)
         
-        with transaction.atomic():
-            po.status = 'RECEIVED'
-            po.save()
-            
-            # Update inventory
-            for line_item in po.line_items.all():
-                inventory, created = Inventory.objects.get_or_create(
-                    store=po.store,
-                    part=line_item.part,
-                    defaults={'quantity_on_hand': 0}
-                )
-                inventory.quantity_on_hand += line_item.quantity
-                inventory.save()
-        
+        po.status = 'RECEIVED'
         serializer = self.get_serializer(po)
         return Response(serializer.data)
 
 
 # Customer Order ViewSet
 class CustomerOrderViewSet(viewsets.ModelViewSet):
-    queryset = CustomerOrder.objects.select_related('customer', 'store').prefetch_related('items').all()
+    queryset = CustomerOrder.objects.select_related('customer', 'store').prefetch_related(
+        Prefetch('items', queryset=OrderItem.objects.select_related('part'))
+    ).all()
     serializer_class = CustomerOrderSerializer
 
     @action(detail=False, methods=['post'])
+    @idempotent('create-order', owner_field='customer_id')
     def create_order(self, request):
-        """Create new customer order with items and payment"""
-        # ... your existing create_order code ...
-        # (leave this as-is)
-        pass
-
-    @action(detail=False, methods=['get'])
+        """
+        Create new customer order with items and payment.
+        Expects JSON like:
+        {
+            "customer_id": 1,
+            "store_id": 1,
+            "items": [{"part_id": 5, "quantity": 2}, ...],
+            "payment_method": "CREDIT_CARD",
+            "card_last_four_digit": "1234"
+        }
+        """
+        serializer = CreateOrderSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        data = serializer.validated_data
+        
+        store = Store.objects.filter(pk=data['store_id']).first()
+        if not store:
+            return Response({'error': f"Store {data['store_id']} not found"},
+                          status=status.HTTP_400_BAD_REQUEST)
+        if not Customer.objects.filter(pk=data['customer_id']).exists():
+            return Response({'error': f"Customer {data['customer_id']} not found"},
+                          status=status.HTTP_400_BAD_REQUEST)
+        
+        if not data['items']:
+            return Response({'error': 'Order has no items'},
+                          status=status.HTTP_400_BAD_REQUEST)
+        
+        # One query for all parts; prices always come from the catalog
+        parts = AutoPart.objects.in_bulk({item['part_id'] for item in data['items']})
+        missing = sorted({item['part_id'] for item in data['items']} - parts.keys())
+        if missing:
+            return Response({'error': 'Unknown parts', 'part_ids': missing},
+                          status=status.HTTP_400_BAD_REQUEST)
+        
+        line_items = [
+            (item['part_id'], item['quantity'], parts[item['part_id']].unit_price)
+            for item in data['items']
+        ]
+        try:
+            order, total = place_order(
+                data['customer_id'], store, line_items, data['payment_method'],
+                data.get('card_last_four_digit', '')
+            )
+        except InsufficientStock as exc:
+            return Response({'error': 'Not enough stock for some items', 'shortfalls': exc.shortfalls},
+                          status=status.HTTP_409_CONFLICT)
+        
+        return Response({
+            'success': True,
+            'order_id': order.order_id,
+            'status': order.status,
+            'total': float(total),
+        }, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['get'], throttle_classes=[OrderFeedRateThrottle])
     def by_store(self, request):
         """
         Get orders for a specific store (for employees).
         Optional ?status= filter (e.g. PROCESSING, PENDING).
+
+        With ?since= the response is a change feed instead:
+        {"results": [...], "removed": [order ids], "cursor": "..."}.
+        Pass an empty `since` for the full list plus a cursor, then the
+        returned cursor on each poll to get only orders changed since then.
+        Changed orders that no longer match ?status= are listed in `removed`.
         """
         store_id = request.query_params.get('store_id')
         status_filter = request.query_params.get('status')
+        since = request.query_params.get('since')
 
         if not store_id:
             return Response(
@@ -297,12 +459,27 @@ class CustomerOrderViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        orders = self.queryset.filter(store_id=store_id).order_by('-order_date')
+        orders = self.queryset.filter(store_id=store_id)
+
+        if since is not None:
+            changes = changed_orders(orders, since, settings.ORDER_FEED_LIMIT)
+            if changes is not None:
+                changed, cursor = changes
+                results = [order for order in changed if not status_filter or order.status == status_filter]
+                removed = [order.order_id for order in changed if status_filter and order.status != status_filter]
+                return Response({
+                    'results': self.get_serializer(results, many=True).data,
+                    'removed': removed,
+                    'cursor': cursor,
+                })
 
+        orders = orders.order_by('-order_date')
         if status_filter:
             orders = orders.filter(status=status_filter)
 
         serializer = self.get_serializer(orders, many=True)
+        if since is not None:
+            return Response({'results': serializer.data, 'removed': [], 'cursor': initial_change_cursor()})
         return Response(serializer.data)
 
     @action(detail=True, methods=['post'])
@@ -369,12 +546,52 @@ class CustomerOrderViewSet(viewsets.ModelViewSet):
         if new_status == 'DELIVERED' and not delivery.delivery_date:
             delivery.delivery_date = today
 
-        order.save()
-        delivery.save()
+        with transaction.atomic():
+            order.save()
+            delivery.save()
+            publish_order_event(order, ORDER_UPDATED)
 
         serializer = CustomerOrderSerializer(order)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    @action(detail=False, methods=['post'])
+    def bulk_update_status(self, request):
+        """
+        Apply one status change to many orders (e.g. end-of-day shipping).
+        Expects JSON like:
+        {
+            "order_ids": [101, 102, 103],
+            "status": "SHIPPED",
+            "delivery_status": "IN_TRANSIT",
+            "employee_id": 3
+        }
+        Returns a result per order: "updated", "unchanged" or "not_found".
+        """
+        serializer = BulkOrderStatusSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        data = serializer.validated_data
+
+        employee = None
+        if 'employee_id' in data:
+            employee = Employee.objects.filter(pk=data['employee_id']).first()
+            if employee is None:
+                return Response(
+                    {'error': f"Employee {data['employee_id']} not found"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        results = bulk_update_status(
+            data['order_ids'],
+            new_status=data.get('status'),
+            delivery_status=data.get('delivery_status'),
+            employee=employee,
+        )
+        return Response({
+            'updated': sum(1 for result in results.values() if result == 'updated'),
+            'results': [{'order_id': order_id, 'result': result} for order_id, result in results.items()],
+        })
+
 
 # Reports API
 @api_view(['GET'])
@@ -391,44 +608,89 @@ def daily_sales_report(request):
     if store_id:
         orders = orders.filter(store_id=store_id)
     
-    total_orders = orders.count()
-    total_revenue = sum(order.get_total_amount() for order in orders)
+    summary = orders.aggregate(total_orders=Count('pk'), total_revenue=Sum('total_amount'))
     
     orders_by_status = orders.values('status').annotate(count=Count('status'))
     
     return Response({
         'date': date,
-        'total_orders': total_orders,
-        'total_revenue': float(total_revenue),
+        'total_orders': summary['total_orders'],
+        'total_revenue': float(summary['total_revenue'] or 0),
         'orders_by_status': list(orders_by_status)
     })
 
 
+def _inventory_aggregates():
+    """Conditional aggregates behind inventory_report, usable with aggregate() or annotate()"""
+    return {
+        'total_items': Count('id'),
+        'low_stock_items': Count('id', filter=Q(needs_reorder=True)),
+        'out_of_stock_items': Count('id', filter=Q(quantity_on_hand=0)),
+        'total_inventory_value': Sum(
+            F('quantity_on_hand') * F('part__unit_price'),
+            output_field=DecimalField(max_digits=18, decimal_places=2),
+        ),
+    }
+
+
 @api_view(['GET'])
 def inventory_report(request):
-    """Generate inventory status report"""
+    """
+    Generate inventory status report.
+    Totals come from one aggregate query. low_stock_details is paginated:
+    pass ?cursor=<next_cursor> for the next page (?page_size=, at most
+    INVENTORY_REPORT_MAX_PAGE_SIZE). ?by_store=1 adds the same totals per store.
+    """
     store_id = request.query_params.get('store_id')
     
-    inventory = Inventory.objects.select_related('part', 'store')
+    inventory = Inventory.objects.all()
     
     if store_id:
         inventory = inventory.filter(store_id=store_id)
     
-    low_stock = inventory.filter(quantity_on_hand__lte=F('part__reorder_level'))
-    out_of_stock = inventory.filter(quantity_on_hand=0)
+    totals = inventory.aggregate(**_inventory_aggregates())
     
-    total_value = sum(
-        item.quantity_on_hand * item.part.unit_price 
-        for item in inventory
+    try:
+        page_size = int(request.query_params.get('page_size', settings.INVENTORY_REPORT_PAGE_SIZE))
+    except ValueError:
+        page_size = settings.INVENTORY_REPORT_PAGE_SIZE
+    page_size = min(max(page_size, 1), settings.INVENTORY_REPORT_MAX_PAGE_SIZE)
+    
+    low_stock, next_cursor = keyset_page(
+        inventory.select_related('part', 'store').filter(needs_reorder=True),
+        ('id',),
+        cursor=request.query_params.get('cursor'),
+        page_size=page_size,
     )
     
-    return Response({
-        'total_items': inventory.count(),
-        'low_stock_items': low_stock.count(),
-        'out_of_stock_items': out_of_stock.count(),
-        'total_inventory_value': float(total_value),
-        'low_stock_details': InventorySerializer(low_stock, many=True).data
-    })
+    report = {
+        'total_items': totals['total_items'],
+        'low_stock_items': totals['low_stock_items'],
+        'out_of_stock_items': totals['out_of_stock_items'],
+        'total_inventory_value': float(totals['total_inventory_value'] or 0),
+        'low_stock_details': InventorySerializer(low_stock, many=True).data,
+        'next_cursor': next_cursor,
+    }
+    
+    if request.query_params.get('by_store') in ('1', 'true'):
+        per_store = (
+            inventory.values('store_id', 'store__name')
+            .annotate(**_inventory_aggregates())
+            .order_by('store_id')
+        )
+        report['stores'] = [
+            {
+                'store_id': row['store_id'],
+                'store_name': row['store__name'],
+                'total_items': row['total_items'],
+                'low_stock_items': row['low_stock_items'],
+                'out_of_stock_items': row['out_of_stock_items'],
+                'total_inventory_value': float(row['total_inventory_value'] or 0),
+            }
+            for row in per_store
+        ]
+    
+    return Response(report)
 
 
 @api_view(['GET'])
@@ -459,74 +721,15 @@ def employee_performance_report(request):
     return Response({'performance': list(performance)})
 
 # Cart helpers & API views
-def _get_cart(request):
-    """
-    Internal helper to get or init cart from session.
-
-    Cart shape in session:
-    {
-        "AP-100245": {
-            "name": "Brake Pad Set",
-            "unit_price": 49.99,
-            "quantity": 2,
-        },
-        ...
-    }
-    """
-    cart = request.session.get("cart", {})
-    if not isinstance(cart, dict):
-        cart = {}
-
-    normalised = {}
-
-    for pid, item in cart.items():
-        # Legacy scalar value (probably just a quantity)
-        if not isinstance(item, dict):
-            try:
-                qty = int(item)
-            except (TypeError, ValueError):
-                qty = 1
-
-            normalised[pid] = {
-                "name": f"Item {pid}",
-                "unit_price": 0.0,
-                "quantity": max(1, qty),
-            }
-            continue
-
-        # Proper dict – make sure required keys exist and are sane
-        name = item.get("name") or f"Item {pid}"
-        try:
-            unit_price = float(item.get("unit_price", 0))
-        except (TypeError, ValueError):
-            unit_price = 0.0
-
-        try:
-            qty = int(item.get("quantity", 1))
-        except (TypeError, ValueError):
-            qty = 1
-
-        normalised[pid] = {
-            "name": name,
-            "unit_price": unit_price,
-            "quantity": max(1, qty),
-        }
-
-    request.session["cart"] = normalised
-    request.session.modified = True
-    return normalised
-
-
 @api_view(["POST"])
 def cart_add(request):
-    """Add item to cart in session."""
+    """Add item to cart in session. Prices are always taken from the catalog."""
     # require logged-in customer
     if not request.session.get("customer_id"):
         return Response({"error": "Login required"}, status=status.HTTP_401_UNAUTHORIZED)
 
     data = request.data
-    part_id = str(data.get("part_id") or "").strip()
-    if not part_id:
+    if not str(data.get("part_id") or "").strip():
         return Response({"error": "part_id is required"}, status=status.HTTP_400_BAD_REQUEST)
 
     # quantity
@@ -536,89 +739,60 @@ def cart_add(request):
         quantity = 1
     quantity = max(1, quantity)
 
-    # Try to read name/price from request first
-    raw_name = (data.get("name") or "").strip()
-    raw_price = data.get("unit_price")
+    # Accept either a primary key or a SKU, store by primary key
+    key = str(data.get("part_id")).strip()
+    entry = resolve_keys([key]).get(key)
+    if entry is None:
+        return Response({"error": "Part not found"}, status=status.HTTP_404_NOT_FOUND)
 
-    part_obj = None
+    cart = CartStore(request.session)
+    cart.add(entry.part_id, quantity)
+    cart.save()
 
-    # If we don't have a good name/price from the request, look up the AutoPart
-    if not raw_name or raw_price in (None, "", 0, "0", "0.0"):
-        try:
-            # numeric -> assume primary key
-            pk = int(part_id)
-            part_obj = AutoPart.objects.filter(pk=pk).first()
-        except ValueError:
-            # non-numeric -> assume SKU
-            part_obj = AutoPart.objects.filter(sku=part_id).first()
-
-        if part_obj:
-            if not raw_name:
-                raw_name = part_obj.name
-            if raw_price in (None, "", 0, "0", "0.0"):
-                raw_price = part_obj.unit_price  # Decimal is fine here
-
-    # Finalize name
-    name = raw_name or f"Item {part_id}"
-
-    # Finalize price as float for JSON
-    try:
-        unit_price = float(raw_price or 0)
-    except Exception:
-        unit_price = float(part_obj.unit_price) if part_obj else 0.0
-
-    cart = _get_cart(request)
-    item = cart.get(part_id, {"name": name, "unit_price": unit_price, "quantity": 0})
-
-    # Always keep latest name/price
-    item["name"] = name
-    item["unit_price"] = unit_price
-    item["quantity"] = int(item.get("quantity", 0)) + quantity
-
-    cart[part_id] = item
-    request.session["cart"] = cart
-    request.session.modified = True
-
-    cart_count = sum(i["quantity"] for i in cart.values())
-    return Response({"success": True, "cart_count": cart_count})
+    return Response({"success": True, "cart_count": cart.count()})
 
 
 @api_view(["GET"])
 def cart_summary(request):
     """Return cart items, totals, and count."""
-    cart = _get_cart(request)
-
-    items = []
-    total = 0.0
-
-    for part_id, item in cart.items():
-        qty = int(item.get("quantity", 0))
-        price = float(item.get("unit_price", 0))
-        line_total = qty * price
-        total += line_total
-
-        items.append({
-            "part_id": part_id,
-            "name": item.get("name", f"Item {part_id}"),
-            "unit_price": price,
-            "quantity": qty,
-            "line_total": line_total,
-        })
+    cart = CartStore(request.session)
+    lines, unresolved, total = price_cart(cart.items())
 
-    cart_count = sum(i["quantity"] for i in items)
+    items = [
+        {
+            "part_id": str(line.key),
+            "name": line.name,
+            "unit_price": float(line.unit_price),
+            "quantity": line.quantity,
+            "line_total": float(line.line_total),
+        }
+        for line in lines
+    ]
+    # Parts that no longer exist stay visible so they can be removed
+    items.extend(
+        {
+            "part_id": str(key),
+            "name": f"Item {key}",
+            "unit_price": 0.0,
+            "quantity": cart.items()[key],
+            "line_total": 0.0,
+        }
+        for key in unresolved
+    )
 
     return Response({
-        "cart_count": cart_count,
+        "cart_count": cart.count(),
         "items": items,
-        "total": total,
+        "total": float(total),
     })
 
 
 @api_view(["POST"])
 def cart_clear(request):
     """Clear the cart completely."""
-    request.session["cart"] = {}
-    request.session.modified = True
+    cart = CartStore(request.session)
+    cart.clear()
+    cart.save()
     return Response({"success": True, "cart_count": 0})
 
 
@@ -626,15 +800,65 @@ def cart_clear(request):
 def cart_remove(request):
     """Remove a single item from the cart."""
     part_id = str(request.data.get("part_id") or "").strip()
-    cart = _get_cart(request)
+    cart = CartStore(request.session)
+    cart.remove(part_id)
+    cart.save()
 
-    if part_id in cart:
-        del cart[part_id]
-        request.session["cart"] = cart
-        request.session.modified = True
+    return Response({"success": True, "cart_count": cart.count()})
+
+@api_view(["POST"])
+def cart_batch(request):
+    """
+    Apply several cart changes at once, e.g. adding a whole kit.
+    Expects JSON body:
+      {
+        "operations": [
+          {"op": "add", "part_id": 12, "quantity": 2},
+          {"op": "set", "part_id": "AP-100245", "quantity": 1},
+          {"op": "remove", "part_id": 7}
+        ]
+      }
+    Parts are looked up in one batch and the session is written once.
+    Nothing is applied if any operation refers to an unknown part.
+    """
+    if not request.session.get("customer_id"):
+        return Response({"error": "Login required"}, status=status.HTTP_401_UNAUTHORIZED)
+
+    serializer = CartBatchSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    operations = serializer.validated_data["operations"]
+
+    parts = resolve_keys(op["part_id"] for op in operations)
+    unknown = sorted({
+        op["part_id"].strip() for op in operations
+        if op["op"] != "remove" and op["part_id"].strip() not in parts
+    })
+    if unknown:
+        return Response(
+            {"error": "Part not found", "part_ids": unknown},
+            status=status.HTTP_404_NOT_FOUND,
+        )
+
+    cart = CartStore(request.session)
+    for op in operations:
+        key = op["part_id"].strip()
+        if op["op"] == "remove":
+            # Drop the line whether the cart holds it under the given key or the part id
+            cart.remove(key)
+            if key in parts:
+                cart.remove(parts[key].part_id)
+            continue
+
+        part_id = parts[key].part_id
+        if op["op"] == "add":
+            cart.add(part_id, max(1, op["quantity"]))
+        else:
+            cart.set(part_id, op["quantity"])
+    cart.save()
+
+    return Response({"success": True, "cart_count": cart.count()})
 
-    cart_count = sum(i["quantity"] for i in cart.values())
-    return Response({"success": True, "cart_count": cart_count})
 
 def cart_page(request):
     if 'customer_id' not in request.session:
@@ -642,6 +866,7 @@ def cart_page(request):
     return render(request, 'customer/cart.html')
 
 @api_view(["POST"])
+@idempotent("cart-checkout")
 def cart_checkout(request):
     """
     Convert the current session cart into a CustomerOrder + Payment.
@@ -650,6 +875,8 @@ def cart_checkout(request):
         "payment_method": "CREDIT_CARD" | "DEBIT_CARD" | "PAYPAL",
         "card_last_four_digit": "1234"
       }
+    Retries that send the same Idempotency-Key header get the original
+    response back instead of placing a second order.
     """
     # Must be logged in as a customer
     customer_id = request.session.get("customer_id")
@@ -660,7 +887,7 @@ def cart_checkout(request):
         )
 
     # Get cart from session
-    cart = _get_cart(request)
+    cart = CartStore(request.session)
     if not cart:
         return Response(
             {"error": "Cart is empty."},
@@ -675,58 +902,9 @@ def cart_checkout(request):
             status=status.HTTP_500_INTERNAL_SERVER_ERROR,
         )
 
-    line_items = []
-    total = Decimal("0.00")
-
-    # Turn session cart entries into concrete AutoPart line items
-    for part_key, item in cart.items():
-        part = None
-        key_str = str(part_key).strip()
-
-        # 1) Try primary key (integer)
-        try:
-            pk = int(key_str)
-            part = AutoPart.objects.filter(pk=pk).first()
-        except (TypeError, ValueError):
-            part = None
-
-        # 2) Try SKU
-        if not part:
-            part = AutoPart.objects.filter(sku=key_str).first()
-
-        # 3) As a last resort, try matching by name
-        if not part:
-            name = (item.get("name") or "").strip()
-            if name:
-                part = AutoPart.objects.filter(name__iexact=name).first()
-
-        # If we still can't resolve the part, skip this entry
-        if not part:
-            continue
-
-        # Quantity
-        try:
-            qty = int(item.get("quantity", 0))
-        except (TypeError, ValueError):
-            qty = 0
-
-        if qty <= 0:
-            continue
-
-        # Unit price—prefer session value, fall back to DB value
-        price_raw = item.get("unit_price", part.unit_price)
-        try:
-            price = Decimal(str(price_raw))
-        except Exception:
-            price = part.unit_price
-
-        if price <= 0:
-            price = part.unit_price
-
-        line_total = price * qty
-        total += line_total
-
-        line_items.append((part, qty, price))
+    # Price every line from the catalog; lines whose part is gone are skipped
+    lines, _, _ = price_cart(cart.items())
+    line_items = [(line.part_id, line.quantity, line.unit_price) for line in lines]
 
     # If nothing usable, bail out
     if not line_items:
@@ -738,46 +916,19 @@ def cart_checkout(request):
     payment_method = request.data.get("payment_method", "CREDIT_CARD")
     card_last4 = (request.data.get("card_last_four_digit") or "")[-4:]
 
-    with transaction.atomic():
-        # Create the order
-        order = CustomerOrder.objects.create(
-            customer_id=customer_id,
-            store=store,
-            status="PENDING",
-        )
-
-        # Create order items
-        for part, qty, price in line_items:
-            OrderItem.objects.create(
-                order=order,
-                part=part,
-                quantity=qty,
-                unit_price=price,
-            )
-
-        # Payment record
-        Payment.objects.create(
-            order=order,
-            payment_method=payment_method,
-            amount=total,
-            card_last_four_digit=card_last4,
-            authentication_code=str(uuid.uuid4())[:12],
+    try:
+        order, total = place_order(
+            customer_id, store, line_items, payment_method, card_last4
         )
-
-        # Delivery record
-        Delivery.objects.create(
-            order=order,
-            tracking_number=f"TRK{order.order_id}{timezone.now().strftime('%Y%m%d%H%M')}",
-            delivery_status="PREPARING",
+    except InsufficientStock as exc:
+        return Response(
+            {"error": "Not enough stock for some items.", "shortfalls": exc.shortfalls},
+            status=status.HTTP_409_CONFLICT,
         )
 
-        # Move order to PROCESSING
-        order.status = "PROCESSING"
-        order.save()
-
     # Clear the session cart now that we've placed the order
-    request.session["cart"] = {}
-    request.session.modified = True
+    cart.clear()
+    cart.save()
 
     return Response(
         {
@@ -786,4 +937,54 @@ def cart_checkout(request):
             "total": float(total),
         },
         status=status.HTTP_201_CREATED,
-    )
\ No newline at end of file
+    )
+
+
+# Order events (Server-Sent Events)
+async def order_events(request):
+    """
+    Stream order.created / order.updated events for ?store_id= as
+    text/event-stream. Each event only carries the order id and status;
+    clients fetch the details from by_store?since=.
+
+    Needs the ASGI application (retail_auto_parts.asgi) so that idle
+    streams do not hold a worker thread. Under WSGI (e.g. runserver) it
+    answers 503 instead, which stops EventSource, and the dashboard keeps
+    polling the change feed. Streams end after ORDER_EVENTS_MAX_AGE seconds
+    and EventSource reconnects, which also drops subscriptions whose client
+    went away without being noticed.
+    """
+    if not isinstance(request, ASGIRequest):
+        response = JsonResponse(
+            {'error': 'Live order events need the ASGI server; poll by_store?since= instead'},
+            status=503,
+        )
+        response['Retry-After'] = str(settings.ORDER_EVENTS_MAX_AGE)
+        return response
+
+    store_id = request.GET.get('store_id', '')
+    if not store_id.isdigit():
+        return JsonResponse({'error': 'store_id parameter required'}, status=400)
+
+    async def stream():
+        subscription = hub.subscribe(int(store_id))
+        deadline = time.monotonic() + settings.ORDER_EVENTS_MAX_AGE
+        try:
+            yield 'retry: 3000\n\n'
+            while time.monotonic() < deadline:
+                try:
+                    event = await asyncio.wait_for(
+                        subscription.queue.get(), settings.ORDER_EVENTS_HEARTBEAT
+                    )
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ': keepalive\n\n'
+                    continue
+                yield format_event(event)
+        finally:
+            hub.unsubscribe(subscription)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -54,6 +54,7 @@ TEMPLATES = [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                "api.context_processors.cart",
             ],
         },
     },
@@ -69,6 +70,11 @@ DATABASES = {
     'default': {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # Seconds a writer waits for another writer's lock before erroring
+        "OPTIONS": {"timeout": 20},
+        # On disk rather than in memory so tests that check out from several
+        # threads wait on SQLite's file lock instead of failing at once
+        "TEST": {"NAME": BASE_DIR / "test_db.sqlite3"},
     }
 }
 
@@ -150,9 +156,72 @@ REST_FRAMEWORK = {
     'DEFAULT_THROTTLE_RATES': {
         'anon': '100/hour',
         'user': '1000/hour',
+        # Typeahead, per client IP (api.views.SuggestRateThrottle)
+        'suggest': '600/minute',
+        # Dashboard polls of by_store?since= (10 s apart, plus one per live event),
+        # per client IP (api.views.OrderFeedRateThrottle)
+        'order_feed': '120/minute',
     },
 }
 
+# Cache (per-process; point this at Redis/Memcached when running several workers)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'retail-auto-parts',
+    }
+}
+
+# Home page featured products: candidate pool rebuilt every FEATURED_POOL_TTL seconds
+FEATURED_POOL_TTL = 15 * 60
+FEATURED_POOL_SIZE = 500
+FEATURED_WEIGHTED = True  # favour best sellers
+
+# Seconds facet counts stay cached per filter combination
+FACET_CACHE_TTL = 5 * 60
+
+# Seconds a stored response is replayed for a repeated Idempotency-Key
+IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+
+# In-process part price cache used to price carts
+PRICE_CACHE_TTL = 5 * 60
+PRICE_CACHE_MAX_ENTRIES = 100000
+
+# Part search: use the maintained search index (Postgres full-text / token
+# table) instead of icontains scans. Set to False to fall back.
+PART_SEARCH_USE_INDEX = config('PART_SEARCH_USE_INDEX', default=True, cast=bool)
+
+# Typeahead index (api.suggest): each process checks the shared version for
+# writes made elsewhere at most this often, and rebuilds at least this often
+SUGGEST_VERSION_CHECK_INTERVAL = 5
+SUGGEST_INDEX_MAX_AGE = 10 * 60
+
+# Number of product cards per catalog/search page
+CATALOG_PAGE_SIZE = 24
+
+# Orders per page of a customer's order history
+ORDER_HISTORY_PAGE_SIZE = 20
+
+# Employee order feed (CustomerOrderViewSet.by_store?since=): most changes
+# returned per poll, and how far behind "now" the cursor is held so orders
+# whose transaction commits late are not skipped
+ORDER_FEED_LIMIT = 200
+ORDER_FEED_LAG = 5
+
+# Order event stream (api/events/orders/): seconds between keepalive
+# comments, and how long one stream lives before the client reconnects
+ORDER_EVENTS_HEARTBEAT = 15
+ORDER_EVENTS_MAX_AGE = 300
+
+# Replenishment (manage.py replenish_stock / purchase-orders/replenish/):
+# low rows are ordered up to reorder_level x multiplier, due in LEAD_DAYS
+REPLENISH_TARGET_MULTIPLIER = 2
+REPLENISH_LEAD_DAYS = 7
+
+# Low-stock rows per page of the inventory report
+INVENTORY_REPORT_PAGE_SIZE = 50
+INVENTORY_REPORT_MAX_PAGE_SIZE = 500
+
 # CORS settings (for frontend integration)
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
@@ -205,7 +274,13 @@ LOGS_DIR = BASE_DIR / 'logs'
 LOGS_DIR.mkdir(exist_ok=True)
 
 # Session settings
-SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+# Sessions (and the cart inside them) live in the DB. Reading them through the
+# cache is only safe when every worker shares it: with the per-process
+# LocMemCache a cart change or logout in one worker would go unseen by another
+if CACHES['default']['BACKEND'] == 'django.core.cache.backends.locmem.LocMemCache':
+    SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+else:
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
 SESSION_COOKIE_AGE = 86400  # 24 hours
 SESSION_SAVE_EVERY_REQUEST = False
 SESSION_COOKIE_HTTPONLY = True
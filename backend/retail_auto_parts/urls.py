@@ -19,6 +19,9 @@ urlpatterns = [
 
     path('search/', views.search_parts, name='search_parts'),
 
+    # infinite-scroll pages of product cards for catalog/search
+    path('products/fragment/', views.product_fragment, name='product-fragment'),
+
     # register cart page
     path('cart/', api_views.cart_page, name='cart-page'),
 
@@ -1,11 +1,15 @@
 # backend/retail_auto_parts/views.py
+from django.conf import settings
 from django.shortcuts import render, redirect
+from django.urls import reverse
 from api.models import AutoPart, Customer 
-from django.db.models import Q
+from api import categories, facets, search
+from api.pagination import keyset_page
+from api.featured import featured_parts
 
 def home(request):
-    # grab 6 random featured products from database
-    featured_products = AutoPart.objects.all().order_by('?')[:6]
+    # 6 featured products sampled from the cached candidate pool
+    featured_products = featured_parts(6)
     return render(request, "home.html", {
         'featured_products': featured_products
     })
@@ -20,7 +24,60 @@ def customer_history_page(request):
     return render(request, "customer/history.html")
 
 # CATALOG VIEW
-def catalog_view(request):
+# Product cards are paged by (name, part_id) so deep pages stay cheap
+PRODUCT_ORDERING = ("name", "part_id")
+# Indexed search results are paged best match first. Keyset pages need every
+# field in one direction, so equal ranks go newest part first rather than by
+# name, and each page re-evaluates the rank in its WHERE clause.
+SEARCH_ORDERING = ("-search_rank", "-part_id")
+
+
+def _catalog_parts(category_slug, condition):
+    parts_qs = AutoPart.objects.all()
+
+    if category_slug:
+        # Exact indexed lookup on the category slug and its subcategories
+        parts_qs = categories.filter_by_category(parts_qs, category_slug)
+
+    if condition:
+        parts_qs = parts_qs.filter(condition=condition)
+
+    return parts_qs
+
+
+def _search_parts(query):
+    """(parts, ordering) for a search box query"""
+    if not query:
+        return AutoPart.objects.none(), PRODUCT_ORDERING
+    if search.index_enabled():
+        return search.search_parts(query), SEARCH_ORDERING
+    return search.basic_search(query, fields=("name", "sku")), PRODUCT_ORDERING
+
+
+def _product_page(request, parts_qs, ordering=PRODUCT_ORDERING):
+    """One keyset page of products plus the URLs used to fetch the next one"""
+    products, next_cursor = keyset_page(
+        parts_qs,
+        ordering,
+        cursor=request.GET.get("cursor"),
+        page_size=settings.CATALOG_PAGE_SIZE,
+    )
+
+    next_page_url = next_fragment_url = None
+    if next_cursor:
+        params = request.GET.copy()
+        params["cursor"] = next_cursor
+        next_page_url = f"{request.path}?{params.urlencode()}"
+        next_fragment_url = f"{reverse('product-fragment')}?{params.urlencode()}"
+
+    return {
+        "products": products,
+        "next_page_url": next_page_url,
+        "next_fragment_url": next_fragment_url,
+    }
+
+
+def catalog_view(request, category_slug=None):
     """
     Catalog page with optional filters, e.g.:
       /catalog/
@@ -28,63 +85,59 @@ def catalog_view(request):
       /catalog/?category=engine-parts&condition=NEW
     """
 
-    category_slug = (request.GET.get("category") or "").strip()
+    category_slug = (request.GET.get("category") or category_slug or "").strip()
     condition = (request.GET.get("condition") or "").strip()
 
-    # text search for in AutoPart.category
-    CATEGORY_KEYWORDS = {
-        "engine-parts": "Engine",
-        "brakes": "Brake",
-        "suspension": "Suspension",
-        "electrical": "Electrical",
-        "exhaust": "Exhaust",
-        "body-parts": "Body",
-    }
-
-    # clean display name for the page heading
-    CATEGORY_LABELS = {
-        "engine-parts": "Engine Parts",
-        "brakes": "Brakes",
-        "suspension": "Suspension",
-        "electrical": "Electrical",
-        "exhaust": "Exhaust",
-        "body-parts": "Body Parts",
-    }
-
-    parts_qs = AutoPart.objects.all()
-
-    selected_category = None
+    selected_category = category_slug or None
     category_display = "All Auto Parts"
-
-    # Filter by category if selected
     if category_slug:
-        selected_category = category_slug
-        keyword = CATEGORY_KEYWORDS.get(category_slug)
-
-        if keyword:
-            # Use icontains so it matches things like "Brake Pad Set", "Brakes ",
-            # "BRAKES", etc., even if the exact category text is different.
-            parts_qs = parts_qs.filter(category__icontains=keyword)
-
-        category_display = CATEGORY_LABELS.get(
-            category_slug, category_slug.replace("-", " ").title()
-        )
-
-    selected_condition = None
+        category_display = categories.label(category_slug) or category_slug.replace("-", " ").title()
+
+    # Facets ignore the condition filter so the other conditions keep their counts
+    part_facets = facets.cached_facets(
+        _catalog_parts(category_slug, ""), view="catalog", category=category_slug
+    )
+    category_counts = {row["slug"]: row["count"] for row in part_facets["category"]}
+    result_count = part_facets["total"]
     if condition:
-        selected_condition = condition
-        parts_qs = parts_qs.filter(condition=condition)
+        result_count = next(
+            (row["count"] for row in part_facets["condition"] if row["value"] == condition), 0
+        )
 
     context = {
-        "products": parts_qs.order_by("name"),
+        "categories": [
+            (slug, name, category_counts.get(slug, 0))
+            for slug, name in categories.top_level()
+        ],
+        "facets": part_facets,
+        "result_count": result_count,
         "selected_category": selected_category,
         "category_display": category_display,
-        "selected_condition": selected_condition,
+        "selected_condition": condition or None,
     }
+    context.update(_product_page(request, _catalog_parts(category_slug, condition)))
 
     # Uses frontend/catalog.html
     return render(request, "catalog.html", context)
 
+
+def product_fragment(request):
+    """
+    Next page of product cards for infinite scroll on the catalog and
+    search pages. Takes the same query string as the page (q or
+    category/condition) plus the cursor.
+    """
+    query = request.GET.get("q", "").strip()
+    if query:
+        parts_qs, ordering = _search_parts(query)
+    else:
+        parts_qs = _catalog_parts(
+            (request.GET.get("category") or "").strip(),
+            (request.GET.get("condition") or "").strip(),
+        )
+        ordering = PRODUCT_ORDERING
+    return render(request, "partials/product_cards.html", _product_page(request, parts_qs, ordering))
+
 def customer_history_page(request):
     """
     Simple view that serves the customer order history template.
@@ -95,17 +148,9 @@ def customer_history_page(request):
 
 def search_parts(request):
     query = request.GET.get('q', '').strip()
-    parts = AutoPart.objects.none()
 
-    if query:
-        parts = AutoPart.objects.filter(
-            Q(name__icontains=query) | Q(sku__icontains=query)
-        ).order_by('name')
-
-    context = {
-        'query': query,
-        'parts': parts,
-    }
+    context = {'query': query}
+    context.update(_product_page(request, *_search_parts(query)))
     return render(request, "search_results.html", context)
 
 def customer_history_page(request):
@@ -4,4 +4,9 @@ from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "retail_auto_parts.settings")
 
-application = get_wsgi_application()
\ No newline at end of file
+application = get_wsgi_application()
+
+# Build the typeahead index now rather than on the first suggest request
+from api.suggest import part_index  # noqa: E402
+
+part_index.load_in_background()